@@ -1,128 +1,120 @@
 from pydoc import html
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, g, Response, abort
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.middleware.proxy_fix import ProxyFix
+from markupsafe import Markup
 import os
-import pickle
+import io
+import csv
+import itertools
+import hashlib
 import sqlite3
-import pandas as pd
-import numpy as np
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
-from ml_pipeline import MODEL_FEATURES  # features per disease
-
-try:
-    import bcrypt
-    _HAS_BCRYPT = True
-except Exception:
-    bcrypt = None
-    _HAS_BCRYPT = False
+from src.features import MODEL_FEATURES, encode_features, encode_rows  # features per disease
+from rule_based.engine import RULE_ENGINE, RULES_VERSION, rule_stats  # compiled clinical range tables
+from src.model_registry import MODEL_REGISTRY  # shared lazy model cache
+from src.inference import predict_with_threshold
+from src.db import ConnectionPool
+from src.history_writer import HistoryWriter
+from src.migrate import migrate  # versioned schema
+from src import history as history_pages  # keyset-paginated history
+from src.passwords import PasswordHasher, HasherBusy
+from src.auth_cache import LoginGuard
+from src.doctors import DoctorDirectory
+from src.prediction_cache import PredictionCache, feature_key
+from src.microbatch import MicroBatcher
 
 # --------------------------------------------------
 # App setup
 # --------------------------------------------------
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET", "dev_secret_key")
-DATABASE = "database.db"
+# Larger request bodies get 413 before they are parsed (batch uploads are the big ones)
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get("MAX_REQUEST_MB", 16)) * 1024 * 1024
+
+# Behind reverse proxies remote_addr is the proxy for every client; trust
+# X-Forwarded-For/-Proto from this many hops so per-IP login throttling
+# sees real client addresses. Leave at 0 when clients connect directly,
+# otherwise they could spoof the header.
+PROXY_HOPS = int(os.environ.get("PROXY_HOPS", 0))
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS)
+DATABASE = os.environ.get("DATABASE", "database.db")
 
 # --------------------------------------------------
 # Database helper
 # --------------------------------------------------
+# Connections are pooled and tuned once (see src/db.py). Each request
+# borrows one connection on first use and returns it on teardown, so
+# routes must not close it.
+DB_POOL = ConnectionPool(DATABASE, size=int(os.environ.get("DB_POOL_SIZE", 8)))
+
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE, timeout=10.0)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
-    return conn
+    """Connection bound to the current app context"""
+    if 'db' not in g:
+        g.db = DB_POOL.acquire()
+    return g.db
+
+
+@app.teardown_appcontext
+def release_db_connection(exception=None):
+    conn = g.pop('db', None)
+    if conn is not None:
+        DB_POOL.release(conn)
+
+
+# Prediction history is written behind the response by a background
+# thread (see src/history_writer.py); pending rows are committed at exit.
+HISTORY_WRITER = HistoryWriter(
+    DATABASE,
+    max_queue=int(os.environ.get("HISTORY_QUEUE_SIZE", 10000)),
+    flush_interval=float(os.environ.get("HISTORY_FLUSH_MS", 50)) / 1000.0,
+    max_batch=int(os.environ.get("HISTORY_FLUSH_ROWS", 500)),
+    spill_path=os.environ.get("HISTORY_SPILL_PATH"),
+)
+
+# Password hashing runs on its own small pool (see src/passwords.py)
+PASSWORD_HASHER = PasswordHasher(
+    workers=int(os.environ.get("PASSWORD_HASH_WORKERS", 2)),
+    max_pending=int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 32)),
+    iterations=int(os.environ.get("PASSWORD_HASH_ITERATIONS", 1_000_000)),
+)
+
+# Doctor directory (data/doctors.json), reloaded when the file changes
+DOCTOR_DIRECTORY = DoctorDirectory(
+    strategy=os.environ.get("DOCTOR_ASSIGNMENT", "round_robin"),
+    check_interval=float(os.environ.get("DOCTOR_RELOAD_INTERVAL", 1.0)),
+)
+
+# Cached user lookups and failed-login backoff (see src/auth_cache.py)
+LOGIN_GUARD = LoginGuard(
+    user_ttl=float(os.environ.get("LOGIN_CACHE_TTL", 30)),
+    miss_ttl=float(os.environ.get("LOGIN_MISS_CACHE_TTL", 1)),
+    free_failures=int(os.environ.get("LOGIN_FREE_FAILURES", 5)),
+    ip_free_failures=int(os.environ.get("LOGIN_IP_FREE_FAILURES", 20)),
+    max_delay=float(os.environ.get("LOGIN_MAX_LOCKOUT", 900)),
+)
+
+# Results per (rule/ml source, disease, version, feature vector) for /predict
+PREDICTION_CACHE = PredictionCache(
+    max_entries=int(os.environ.get("PREDICTION_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("PREDICTION_CACHE_TTL", 600)),
+)
+
+# Concurrent single-row ML predictions share one forest pass (src/microbatch.py)
+ML_BATCHER = MicroBatcher(
+    max_rows=int(os.environ.get("ML_BATCH_MAX_ROWS", 64)),
+    max_wait=float(os.environ.get("ML_BATCH_WAIT_MS", 2)) / 1000.0,
+)
 
 # --------------------------------------------------
 # Database initialization
 # --------------------------------------------------
 def init_db():
-    """Initialize the database with schema if it doesn't exist"""
+    """Create or upgrade the database schema (migrations/*.sql)"""
     try:
-        conn = sqlite3.connect(DATABASE, timeout=10.0)
-        cursor = conn.cursor()
-        
-        # Create users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password_hash BLOB NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create predictions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS predictions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                disease TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                input_data TEXT,
-                result TEXT NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Create contact table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS contact (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                email TEXT NOT NULL,
-                message TEXT NOT NULL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create consultations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS consultations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                predicted_disease TEXT NOT NULL,
-                risk_status TEXT NOT NULL,
-                primary_symptoms TEXT NOT NULL,
-                recommended_specialist TEXT NOT NULL,
-                hospital_name TEXT NOT NULL,
-                hospital_address TEXT NOT NULL,
-                consultation_date TEXT NOT NULL,
-                notes TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id)
-            )
-        ''')
-        
-        # Create appointments table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS appointments (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                doctor_name TEXT NOT NULL,
-                patient_name TEXT NOT NULL,
-                patient_email TEXT NOT NULL,
-                patient_phone TEXT NOT NULL,
-                appointment_date TEXT NOT NULL,
-                appointment_time TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create consultation intents table (lightweight, offline consultation requests)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS consultation_intents (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                doctor_name TEXT NOT NULL,
-                patient_name TEXT NOT NULL,
-                mobile_number TEXT NOT NULL,
-                expected_visit_window TEXT NOT NULL,
-                problem_summary TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        migrate(DATABASE)
         print("✓ Database initialized successfully")
     except Exception as e:
         print(f"✗ Database initialization failed: {e}")
@@ -137,354 +129,58 @@ def inject_now():
 # --------------------------------------------------
 # Load ML models
 # --------------------------------------------------
+# Components are loaded lazily through the shared registry (see
+# src/model_registry.py) and reloaded when a new artifact version is published.
 ML_DISEASES = ["diabetes", "kidney", "liver"]
-MODEL_COMPONENTS = {}
-for disease in ML_DISEASES:
+
+
+def get_model_components(disease_name):
+    """Return model/scaler/imputer for a disease, or None if unavailable"""
     try:
-        MODEL_COMPONENTS[disease] = {
-            "model": pickle.load(open(f"models/{disease}_model.pkl", "rb")),
-            "scaler": pickle.load(open(f"models/{disease}_scaler.pkl", "rb")),
-            "imputer": pickle.load(open(f"models/{disease}_imputer.pkl", "rb"))
-        }
-    except Exception:
-        pass
+        return MODEL_REGISTRY.get(disease_name)
+    except FileNotFoundError:
+        # Logged once by the registry, which remembers the missing artifact
+        return None
+    except Exception as e:
+        print(f"[Error] Failed to load model files for {disease_name}: {e}")
+        return None
 
 # --------------------------------------------------
 # RULE-BASED LOGIC
 # --------------------------------------------------
+# Healthy ranges live in data/clinical_ranges.json and are compiled once by
+# rule_based/engine.py; these functions evaluate one form submission.
 def thyroid_rule(inputs):
-    """
-    Thyroid Disorder Risk Assessment (Rule-Based)
-    Based on healthy parameter ranges provided
-    
-    Inputs:
-    - Age: 20–40 healthy
-    - Sex: Male/Female
-    - TSH (µIU/mL): 0.4–4.0 healthy, <0.4 (hyper) or >4.0 (hypo) disease
-    - T3 (ng/dL): 80–200 healthy, <80 or >200 disease
-    - T4 (µg/dL): 4.5–12 healthy, <4.5 or >12 disease
-    - Thyroxine: Normal/High/Low
-
-    Returns: "Normal" or "Risky"
-    """
-    try:
-        age = float(inputs.get('Age', 0))
-        sex_input = inputs.get('Sex', '').strip()
-        
-        # Convert Male/Female to 0/1 for internal processing
-        if sex_input.lower() == 'male':
-            sex = 0
-        elif sex_input.lower() == 'female':
-            sex = 1
-        else:
-            try:
-                sex = int(sex_input)
-            except:
-                return "Risky"
-        
-        tsh = float(inputs.get('TSH', 0))
-        t3 = float(inputs.get('T3', 0))
-        t4 = float(inputs.get('T4', 0))
-        thyroxine_input = inputs.get('Thyroxine', '').strip()
-        
-        # Convert Thyroxine status to 0/1
-        if thyroxine_input.lower() in ['normal', 'none', '0']:
-            thyroxine = 0
-        elif thyroxine_input.lower() in ['high', 'low', 'abnormal', '1']:
-            thyroxine = 1
-        else:
-            try:
-                thyroxine = int(thyroxine_input)
-            except:
-                return "Risky"
-    except:
-        return "Risky"
-
-    # Check age
-    if age <= 0 or age > 120:
-        return "Risky"
-
-    # Check sex
-    if sex not in [0, 1]:
-        return "Risky"
-
-    # TSH: 0.4–4.0 healthy, <0.4 or >4.0 disease
-    if tsh < 0.4 or tsh > 4.0:
-        return "Risky"
-    
-    # T3: 80–200 healthy, <80 or >200 disease
-    if t3 < 80 or t3 > 200:
-        return "Risky"
-    
-    # T4: 4.5–12 healthy, <4.5 or >12 disease
-    if t4 < 4.5 or t4 > 12:
-        return "Risky"
-    
-    # Thyroxine: Normal (0) healthy, High/Low (1) disease
-    if thyroxine == 1:
-        return "Risky"
-
-    return "Normal"
-
+    """Thyroid Disorder Risk Assessment (Rule-Based). Returns "Normal" or "Risky"."""
+    return RULE_ENGINE['thyroid'].predict_one(inputs)
 
 
 def malaria_rule(inputs):
-    """
-    Malaria Risk Assessment (Rule-Based)
-    Based on healthy parameter ranges provided
-    
-    Inputs:
-    - Temperature (°C): 36.1–37.2 healthy, >38 disease
-    - Headache: None (0) healthy, Present (1) or Severe (2) indicates risk
-    - Vomiting: None (0) healthy, Present (1) or Severe (2) indicates risk
-    - JointPain: None (0) healthy, Present (1) or Severe (2) indicates risk
-    - RBC (millions/µL): 4.2–6.1 healthy, Low (<4.2) disease
-
-    Returns: "Normal" or "Risky"
-    """
-    try:
-        temp = float(inputs.get('Temperature', 0))
-        
-        # Convert Headache input (None=0, Present=1, Severe=2)
-        headache_input = str(inputs.get('Headache', '0')).strip()
-        if headache_input.lower() == 'none':
-            headache = 0
-        elif headache_input.lower() == 'present':
-            headache = 1
-        elif headache_input.lower() == 'severe':
-            headache = 2
-        else:
-            headache = int(headache_input)
-        
-        # Convert Vomiting input (None=0, Present=1, Severe=2)
-        vomiting_input = str(inputs.get('Vomiting', '0')).strip()
-        if vomiting_input.lower() == 'none':
-            vomiting = 0
-        elif vomiting_input.lower() == 'present':
-            vomiting = 1
-        elif vomiting_input.lower() == 'severe':
-            vomiting = 2
-        else:
-            vomiting = int(vomiting_input)
-        
-        # Convert JointPain input (None=0, Present=1, Severe=2)
-        joint_pain_input = str(inputs.get('JointPain', '0')).strip() if 'JointPain' in inputs else str(inputs.get('Joint_Pain', '0')).strip()
-        if joint_pain_input.lower() == 'none':
-            joint_pain = 0
-        elif joint_pain_input.lower() == 'present':
-            joint_pain = 1
-        elif joint_pain_input.lower() == 'severe':
-            joint_pain = 2
-        else:
-            joint_pain = int(joint_pain_input)
-        
-        rbc = float(inputs.get('RBC', 0))
-    except:
-        return "Risky"
+    """Malaria Risk Assessment (Rule-Based). Returns "Normal" or "Risky"."""
+    return RULE_ENGINE['malaria'].predict_one(inputs)
 
-    # Temperature: 36.1–37.2 healthy, >38 disease
-    if temp > 38:
-        return "Risky"
-    
-    # Headache: None (0) healthy, Present (1) or Severe (2) indicates risk
-    if headache > 0:
-        return "Risky"
-    
-    # Vomiting: None (0) healthy, Present (1) or Severe (2) indicates risk
-    if vomiting > 0:
-        return "Risky"
-    
-    # Joint Pain: None (0) healthy, Present (1) or Severe (2) indicates risk
-    if joint_pain > 0:
-        return "Risky"
-    
-    # RBC: 4.2–6.1 healthy, Low (<4.2) disease
-    if rbc < 4.2:
-        return "Risky"
-
-    return "Normal"
 
 def pneumonia_rule(inputs):
-    """
-    Pneumonia Detection (Rule-Based)
-    Based on healthy parameter ranges provided
-    
-    Inputs:
-    - Age: 20–40 healthy, >50 at higher risk
-    - CoughSeverity: None (0) healthy, Mild (1) or Severe (2) disease or text values: "none" (0), "present" (1)
-    - WBC (/µL): 4k–10k healthy, >10k disease
-    - OxygenSaturation (%): 95–100 healthy, <94 disease
-    - Fever (°C): 36.1–37.2 healthy, >38 disease
-    
-    Returns: "Normal" or "Risky"
-    """
-    try:
-        age = float(inputs.get('Age', 0))
-        cough_input = inputs.get('CoughSeverity', '0').strip().lower()
-        # Map text values to numeric: "none" -> 0, "present" -> 1, or parse as int directly
-        if cough_input == 'none':
-            cough_severity = 0
-        elif cough_input == 'present':
-            cough_severity = 1
-        else:
-            cough_severity = int(cough_input)
-        fever = float(inputs.get('Fever', 0))
-        wbc = float(inputs.get('WBC', 0))
-        oxygen = float(inputs.get('OxygenSaturation', 0)) if 'OxygenSaturation' in inputs else float(inputs.get('Oxygen_Saturation', 0))
-    except:
-        return "Risky"
-
-    # Age: 20–40 healthy, >50 at higher risk
-    if age > 50:
-        return "Risky"
-    
-    # CoughSeverity: 0=None (healthy), 1=Mild, 2=Severe (disease)
-    if cough_severity > 0:
-        return "Risky"
-    
-    # Fever: 36.1–37.2 healthy, >38 disease
-    if fever > 38:
-        return "Risky"
-    
-    # WBC: 4k–10k healthy, >10k disease
-    # Handle both formats: 4-10 (in thousands) or 4000-10000 (actual count)
-    wbc_normalized = wbc if wbc > 100 else wbc * 1000
-    if wbc_normalized > 10000:
-        return "Risky"
-    
-    # Oxygen Saturation: 95–100 healthy, <94 disease
-    if oxygen < 94:
-        return "Risky"
+    """Pneumonia Detection (Rule-Based). Returns "Normal" or "Risky"."""
+    return RULE_ENGINE['pneumonia'].predict_one(inputs)
 
-    return "Normal"
 
+def kidney_rule(inputs):
+    """Kidney Disease Risk Assessment (Rule-Based). Returns "Normal" or "Risky"."""
+    return RULE_ENGINE['kidney'].predict_one(inputs)
 
-    # Risk assessment
-    if risk_factors >= 3:
-        return "Risky"
-    else:
-        return "Normal"
 
-def kidney_rule(inputs):
-    """
-    Kidney Disease Risk Assessment (Rule-Based)
-    Based on healthy parameter ranges provided
-    
-    Accepts keys:
-    - 'sg': Specific Gravity (1.005–1.030 healthy)
-    - 'al': Albumin in g/dL (3.4–5.4 healthy)
-    - 'rbc': RBC in millions/µL (4.2–6.1 healthy)
-    - 'pc': Platelet Count in /µL (150k–450k healthy)
-    - 'hemo': Hemoglobin in g/dL (12–18 healthy, women 12–16, men 14–18)
-    - 'wc': WBC in /µL (4k–10k healthy)
-    - 'rc': RBC alternative (4.2–6.1 healthy)
-    - 'bp': Blood Pressure mmHg (90–120 / 60–80 healthy, risky at ≥140 / 90)
-    
-    Returns: "Normal" or "Risky"
-    """
-    try:
-        sg = float(inputs.get('sg', 0))
-        al = float(inputs.get('al', 0))
-        rbc = float(inputs.get('rbc', 0))
-        pc = float(inputs.get('pc', 0))
-        hemo = float(inputs.get('hemo', 0))
-        wc = float(inputs.get('wc', 0))
-        rc = float(inputs.get('rc', 0))
-        bp = float(inputs.get('bp', 0))
-    except:
-        return "Risky"
-
-    # SG (Specific Gravity): 1.005–1.030 healthy
-    if sg < 1.005 or sg > 1.030:
-        return "Risky"
-    
-    # Albumin (AL, g/dL): 3.4–5.4 healthy
-    if al < 3.4 or al > 5.4:
-        return "Risky"
-    
-    # RBC (millions/µL): 4.2–6.1 healthy
-    if rbc < 4.2 or rbc > 6.1:
-        return "Risky"
-    
-    # PC (Platelet Count, /µL): 150k–450k healthy
-    # Note: Accept both 150-450 (in thousands) and 150000-450000 (actual count)
-    pc_normalized = pc if pc > 450 else pc * 1000  # Convert if in thousands
-    if pc_normalized < 150000 or pc_normalized > 450000:
-        return "Risky"
-    
-    # Hemoglobin (g/dL): 12–18 healthy (combined range for both genders)
-    if hemo < 12 or hemo > 18:
-        return "Risky"
-    
-    # WBC (/µL): 4k–10k healthy
-    # Accept both 4-10 (in thousands) and 4000-10000 (actual count)
-    wc_normalized = wc if wc > 100 else wc * 1000  # Convert if in thousands
-    if wc_normalized < 4000 or wc_normalized > 10000:
-        return "Risky"
-    
-    # RC (RBC, millions/µL): 4.2–6.1 healthy
-    if rc < 4.2 or rc > 6.1:
-        return "Risky"
-    
-    # BP (mmHg): 90–120 / 60–80 healthy, ≥140 / 90 indicates disease
-    if bp < 90 or bp >= 140:
-        return "Risky"
-    
-    return "Normal"
 def liver_rule(inputs):
-    """
-    Liver Disease Risk Assessment (Rule-Based)
-    Based on healthy parameter ranges provided
-    
-    Accepts keys:
-    - 'Age': 20–40 healthy, >50 indicates disease
-    - 'Gender': M/F (no indication)
-    - 'Total_Bilirubin': 0.1–1.2 healthy, >1.2 indicates disease
-    - 'Direct_Bilirubin': 0–0.3 healthy, >0.3 indicates disease
-    - 'Alkaline_Phosphotase': 44–147 healthy, >147 indicates disease
-    - 'Alamine_Aminotransferase': 7–56 healthy, >56 indicates disease
-    - 'Aspartate_Aminotransferase': 10–40 healthy, >40 indicates disease
-    
-    Returns "Normal" or "Risky"
-    """
-    try:
-        age = float(str(inputs.get('Age', 0)).strip())
-        tb = float(str(inputs.get('Total_Bilirubin', 0)).strip())
-        db = float(str(inputs.get('Direct_Bilirubin', 0)).strip())
-        alkphos = float(str(inputs.get('Alkaline_Phosphotase', 0)).strip())
-        sgpt = float(str(inputs.get('Alamine_Aminotransferase', 0)).strip())
-        sgot = float(str(inputs.get('Aspartate_Aminotransferase', 0)).strip())
-    except Exception:
-        return "Risky"
-
-    # Age check: 20-40 healthy, >50 indicates disease
-    if age <= 0 or age > 120:
-        return "Risky"
-    if age > 50:
-        return "Risky"
-
-    # Total Bilirubin (mg/dL): 0.1–1.2 healthy, >1.2 indicates disease
-    if tb < 0.1 or tb > 1.2:
-        return "Risky"
-    
-    # Direct Bilirubin (mg/dL): 0–0.3 healthy, >0.3 indicates disease
-    if db < 0 or db > 0.3:
-        return "Risky"
-    
-    # Alkaline Phosphatase (IU/L): 44–147 healthy, >147 indicates disease
-    if alkphos < 44 or alkphos > 147:
-        return "Risky"
-    
-    # ALT (U/L): 7–56 healthy, >56 indicates disease
-    if sgpt < 7 or sgpt > 56:
-        return "Risky"
-    
-    # AST (U/L): 10–40 healthy, >40 indicates disease
-    if sgot < 10 or sgot > 40:
-        return "Risky"
+    """Liver Disease Risk Assessment (Rule-Based). Returns "Normal" or "Risky"."""
+    return RULE_ENGINE['liver'].predict_one(inputs)
 
-    return "Normal"
 
+def kidney_sanity_rule(inputs):
+    """
+    Medical sanity check applied on top of the kidney ML model
+    (the stricter 'kidney_sanity' ranges). Returns "Normal" or "Risky"
+    """
+    return RULE_ENGINE['kidney_sanity'].predict_one(inputs)
 
 
 RULE_BASED = {
@@ -700,38 +396,19 @@ def index():
 # --------------------------------------------------
 # Disease to Doctor Mapping
 # --------------------------------------------------
+def appointment_counts(doctor_names):
+    """Booked appointments per doctor (uses idx_appointments_doctor_date)"""
+    placeholders = ", ".join("?" * len(doctor_names))
+    rows = get_db_connection().execute(
+        f"SELECT doctor_name, COUNT(*) FROM appointments WHERE doctor_name IN ({placeholders}) "
+        "GROUP BY doctor_name",
+        list(doctor_names),
+    ).fetchall()
+    return {name: count for name, count in rows}
+
 def get_recommended_doctor(disease_name):
-    """Map diseases to recommended doctor specialties"""
-    disease_doctor_map = {
-        'diabetes': 'Endocrinology',
-        'kidney': 'Nephrology',
-        'liver': 'Hepatology',
-        'malaria': 'Infectious Diseases',
-        'thyroid': 'Endocrinology',
-        'pneumonia': 'Pulmonology'
-    }
-    
-    specialty = disease_doctor_map.get(disease_name, 'General Practice')
-    
-    # Get all doctors and find the first one with matching specialty
-    all_doctors = [
-        {"name": "Dr. Alice Smith", "specialty": "Cardiology", "experience": "10 years", "phone": "1234567890"},
-        {"name": "Dr. Bob Johnson", "specialty": "Nephrology", "experience": "8 years", "phone": "0987654321"},
-        {"name": "Dr. Sarah Williams", "specialty": "Endocrinology", "experience": "12 years", "phone": "1122334455"},
-        {"name": "Dr. Michael Brown", "specialty": "Hepatology", "experience": "9 years", "phone": "2233445566"},
-        {"name": "Dr. Emily Davis", "specialty": "Infectious Diseases", "experience": "7 years", "phone": "3344556677"},
-        {"name": "Dr. James Wilson", "specialty": "Pulmonology", "experience": "11 years", "phone": "4455667788"},
-        {"name": "Dr. Jennifer Martinez", "specialty": "Internal Medicine", "experience": "8 years", "phone": "5566778899"},
-        {"name": "Dr. Robert Taylor", "specialty": "General Practice", "experience": "15 years", "phone": "6677889900"},
-        {"name": "Dr. Lisa Anderson", "specialty": "Preventive Medicine", "experience": "6 years", "phone": "7788990011"},
-        {"name": "Dr. David Thomas", "specialty": "Pathology", "experience": "10 years", "phone": "8899001122"},
-    ]
-    
-    for doctor in all_doctors:
-        if doctor['specialty'] == specialty:
-            return doctor
-    
-    return all_doctors[7]  # Return General Practice as fallback
+    """Pick a doctor from the specialty that treats disease_name (see data/doctors.json)"""
+    return DOCTOR_DIRECTORY.recommend(disease_name, appointment_counts)
 
 @app.route('/detect')
 def detect():
@@ -741,7 +418,7 @@ def detect():
 
 @app.route('/consult')
 def consult():
-    return render_template('consult.html')
+    return render_template('consult.html', doctors=DOCTOR_DIRECTORY.all())
 
 @app.route('/submit_consultation_intent', methods=['POST'])
 def submit_consultation_intent():
@@ -767,10 +444,8 @@ def submit_consultation_intent():
             return jsonify({'status': 'error', 'message': 'Problem summary cannot exceed 500 characters.'})
         
         # Save consultation intent to database
-        conn = sqlite3.connect(DATABASE)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        conn = get_db_connection()
+        conn.execute('''
             INSERT INTO consultation_intents (doctor_name, patient_name, mobile_number, expected_visit_window, problem_summary)
             VALUES (?, ?, ?, ?, ?)
         ''', (
@@ -782,7 +457,6 @@ def submit_consultation_intent():
         ))
         
         conn.commit()
-        conn.close()
         
         return jsonify({
             'status': 'success',
@@ -812,10 +486,8 @@ def book_appointment():
             return jsonify({'status': 'error', 'message': 'Invalid email address.'})
         
         # Save appointment to database
-        conn = sqlite3.connect('app.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        conn = get_db_connection()
+        conn.execute('''
             INSERT INTO appointments (doctor_name, patient_name, patient_email, patient_phone, appointment_date, appointment_time)
             VALUES (?, ?, ?, ?, ?, ?)
         ''', (
@@ -828,7 +500,6 @@ def book_appointment():
         ))
         
         conn.commit()
-        conn.close()
         
         return jsonify({
             'status': 'success',
@@ -880,7 +551,6 @@ def submit_consultation():
                 )
             )
             conn.commit()
-            conn.close()
             
             return jsonify({
                 'status': 'success',
@@ -911,7 +581,6 @@ def about():
                 (name, email, message)
             )
             conn.commit()
-            conn.close()
             return jsonify({'status': 'success', 'message': 'Thank you! Your message has been received. We will get back to you soon.'})
         except Exception as e:
             print(f"Error saving contact message: {e}")
@@ -932,24 +601,25 @@ def signup():
         if not username or not password or not email:
             return render_template('signup.html', error="All fields are required.")
 
-        # Hash password securely using pbkdf2:sha256
-        password_hash = generate_password_hash(password, method='pbkdf2:sha256')
-
         try:
             conn = get_db_connection()
             # Check if username already exists
             existing = conn.execute("SELECT * FROM users WHERE username=?", (username,)).fetchone()
             if existing:
-                conn.close()
                 return render_template('signup.html', error="Username already exists. Choose another.")
-            
+
+            # Hash password securely using pbkdf2:sha256 (on the hashing pool)
+            password_hash = PASSWORD_HASHER.hash(password)
+
             conn.execute(
                 "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
                 (username, email, password_hash)
             )
             conn.commit()
-            conn.close()
+            LOGIN_GUARD.forget_user(username)
             return redirect(url_for('login'))
+        except HasherBusy:
+            return render_template('signup.html', error="Server is busy. Please try again in a moment."), 503
         except sqlite3.DatabaseError as e:
             return render_template('signup.html', error=f"Database error: {str(e)}")
         except Exception as e:
@@ -958,17 +628,50 @@ def signup():
 
 
 
+def load_login_user(username):
+    row = get_db_connection().execute(
+        "SELECT id, password_hash FROM users WHERE username=?", (username,)
+    ).fetchone()
+    return dict(row) if row else None
+
+def upgrade_password_hash(username, user_id, password):
+    """Re-hash a legacy/old-cost password in the background after a successful login"""
+    def store(future):
+        if future.exception() is not None:
+            return
+        conn = DB_POOL.acquire()
+        try:
+            with conn:
+                conn.execute("UPDATE users SET password_hash=? WHERE id=?", (future.result(), user_id))
+            LOGIN_GUARD.forget_user(username)
+        except sqlite3.Error as e:
+            print(f"[Error] Password rehash for user {user_id} failed: {e}")
+        finally:
+            DB_POOL.release(conn)
+
+    try:
+        PASSWORD_HASHER.hash_async(password).add_done_callback(store)
+    except HasherBusy:
+        pass  # try again on a later login
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
 
-        conn = get_db_connection()
-        user = conn.execute("SELECT * FROM users WHERE username=?", (username,)).fetchone()
-        conn.close()
+        ip = request.remote_addr
+
+        # Throttled usernames/IPs are refused before any lookup or hashing
+        retry_after = LOGIN_GUARD.retry_after(username, ip)
+        if retry_after:
+            error = f"Too many failed attempts. Try again in {int(retry_after) + 1} seconds."
+            return render_template('login.html', error=error), 429
+
+        user = LOGIN_GUARD.get_user(username, load_login_user)
 
         if not user:
+            LOGIN_GUARD.record_failure(username, ip)
             return render_template('login.html', error="Invalid username or password")
 
         stored_hash = user['password_hash']
@@ -977,42 +680,26 @@ def login():
         if not stored_hash or stored_hash.strip() == '':
             return render_template('login.html', error="Password not set for this user. Please sign up again.")
 
-        # Ensure hash is string
-        if isinstance(stored_hash, (bytes, bytearray)):
-            try:
-                stored_hash = stored_hash.decode('utf-8')
-            except Exception:
-                # keep as bytes for bcrypt
-                pass
-
-        # Detect bcrypt-style hashes (they start with $2a/$2b/$2y)
+        # Verify on the hashing pool (pbkdf2 / scrypt via werkzeug, or bcrypt)
         try:
-            is_bcrypt = False
-            if isinstance(stored_hash, (bytes, bytearray)):
-                is_bcrypt = bytes(stored_hash).startswith(b'$2')
-            elif isinstance(stored_hash, str):
-                is_bcrypt = stored_hash.startswith('$2')
-
-            if is_bcrypt:
-                if not _HAS_BCRYPT:
-                    return render_template('login.html', error='Server misconfiguration: bcrypt not available')
-                hash_bytes = stored_hash if isinstance(stored_hash, (bytes, bytearray)) else stored_hash.encode('utf-8')
-                if bcrypt.checkpw(password.encode('utf-8'), hash_bytes):
-                    session['user_id'] = user['id']
-                    session['username'] = username
-                    return redirect(url_for('dashboard'))
-                else:
-                    return render_template('login.html', error='Invalid username or password')
-            else:
-                # Use werkzeug for pbkdf2 / scrypt etc.
-                if check_password_hash(stored_hash, password):
-                    session['user_id'] = user['id']
-                    session['username'] = username
-                    return redirect(url_for('dashboard'))
+            ok, needs_rehash = PASSWORD_HASHER.verify(stored_hash, password)
+        except HasherBusy:
+            return render_template('login.html', error='Server is busy. Please try again in a moment.'), 503
+        except RuntimeError:
+            return render_template('login.html', error='Server misconfiguration: bcrypt not available')
         except ValueError:
             # Raised by werkzeug if stored hash is malformed
             return render_template('login.html', error='Stored password hash is invalid')
 
+        if ok:
+            LOGIN_GUARD.record_success(username, ip)
+            if needs_rehash:
+                upgrade_password_hash(username, user['id'], password)
+            session['user_id'] = user['id']
+            session['username'] = username
+            return redirect(url_for('dashboard'))
+
+        LOGIN_GUARD.record_failure(username, ip)
         return render_template('login.html', error="Invalid username or password")
 
     return render_template('login.html')
@@ -1026,161 +713,411 @@ def dashboard():
     user_id = session.get('user_id')
     if not user_id:
         return redirect(url_for('login'))
+    # Make this user's just-submitted predictions visible
+    HISTORY_WRITER.flush(timeout=1.0)
     conn = get_db_connection()
-    history = conn.execute(
-        "SELECT * FROM predictions WHERE user_id=? ORDER BY timestamp DESC", (user_id,)
-    ).fetchall()
-    conn.close()
-    return render_template('dashboard.html', history=history)
+    try:
+        history, next_cursor = history_pages.fetch_page(
+            conn, user_id,
+            cursor=request.args.get('before'),
+            limit=history_pages.page_size(request.args.get('limit')),
+        )
+    except ValueError:
+        return redirect(url_for('dashboard'))
+    return render_template(
+        'dashboard.html',
+        history=history,
+        next_cursor=next_cursor,
+        is_first_page=not request.args.get('before'),
+    )
+
+@app.route('/api/history')
+def api_history():
+    """JSON page of the user's history; pass next_cursor back as ?before="""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'status': 'error', 'message': 'Login required.'}), 401
+    HISTORY_WRITER.flush(timeout=1.0)
+    conn = get_db_connection()
+    try:
+        rows, next_cursor = history_pages.fetch_page(
+            conn, user_id,
+            cursor=request.args.get('before'),
+            limit=history_pages.page_size(request.args.get('limit')),
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    return jsonify({
+        'status': 'success',
+        'count': len(rows),
+        'next_cursor': next_cursor,
+        'results': [history_pages.row_to_dict(row) for row in rows],
+    })
+
+# Confirmed outcomes become retraining labels (ml_pipeline.py --incremental),
+# so only these accounts may record them, and only for their own predictions
+OUTCOME_RECORDERS = frozenset(
+    name.strip() for name in os.environ.get("OUTCOME_RECORDERS", "").split(",") if name.strip()
+)
+OUTCOME_VALUES = {'Normal': 0, 'Risky': 1, '0': 0, '1': 1, 0: 0, 1: 1}
+
+@app.route('/api/history/<int:prediction_id>/outcome', methods=['POST'])
+def record_outcome(prediction_id):
+    """Record the confirmed diagnosis for one of the user's predictions"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'status': 'error', 'message': 'Login required.'}), 401
+    if session.get('username') not in OUTCOME_RECORDERS:
+        return jsonify({'status': 'error', 'message': 'Not allowed to record outcomes.'}), 403
+
+    data = request.get_json(silent=True)
+    if data is None:
+        data = request.form
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'Body must be a JSON object.'}), 400
+    outcome = data.get('outcome')
+    # bool is an int subclass: True must not pass as 1
+    if not isinstance(outcome, (str, int)) or isinstance(outcome, bool):
+        outcome = None
+    outcome = OUTCOME_VALUES.get(outcome)
+    if outcome is None:
+        return jsonify({'status': 'error', 'message': 'Outcome must be Normal or Risky.'}), 400
+
+    conn = get_db_connection()
+    prediction = conn.execute(
+        "SELECT disease FROM predictions WHERE id=? AND user_id=?", (prediction_id, user_id)
+    ).fetchone()
+    if not prediction:
+        return jsonify({'status': 'error', 'message': 'Prediction not found.'}), 404
+
+    # Re-recording gets a new id, so the next retrain picks up the correction
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO prediction_outcomes (prediction_id, disease, outcome) VALUES (?, ?, ?)",
+            (prediction_id, prediction['disease'], outcome),
+        )
+    return jsonify({'status': 'success', 'prediction_id': prediction_id, 'outcome': outcome})
+
+@app.route('/dashboard/export')
+def export_history():
+    """Stream the full history as CSV, one keyset chunk at a time"""
+    user_id = session.get('user_id')
+    if not user_id:
+        return redirect(url_for('login'))
+    HISTORY_WRITER.flush(timeout=1.0)
+
+    def generate():
+        # Own connection: the response outlives the request's g.db
+        conn = DB_POOL.acquire()
+        try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(history_pages.COLUMNS)
+            for row in history_pages.iter_history(conn, user_id):
+                writer.writerow([row[column] for column in history_pages.COLUMNS])
+                if buffer.tell() >= 64 * 1024:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        finally:
+            DB_POOL.release(conn)
+
+    return Response(
+        generate(),
+        mimetype='text/csv',
+        headers={'Content-Disposition': 'attachment; filename=prediction_history.csv'},
+    )
+
+@app.route('/status')
+def status():
+    """Internal health/queue metrics (model versions, cache and rule stats): OUTCOME_RECORDERS only"""
+    if not session.get('user_id'):
+        return jsonify({'status': 'error', 'message': 'Login required.'}), 401
+    if session.get('username') not in OUTCOME_RECORDERS:
+        return jsonify({'status': 'error', 'message': 'Not allowed to view status.'}), 403
+    return jsonify({
+        'status': 'success',
+        'history_writer': HISTORY_WRITER.stats(),
+        'db_pool': DB_POOL.stats(),
+        'models': MODEL_REGISTRY.stats(),
+        'password_hasher': PASSWORD_HASHER.stats(),
+        'login_guard': LOGIN_GUARD.stats(),
+        'doctors': DOCTOR_DIRECTORY.stats(),
+        'rules': rule_stats(),
+        'prediction_cache': PREDICTION_CACHE.stats(),
+        'ml_batcher': ML_BATCHER.stats(),
+    })
 
 @app.route('/logout')
 def logout():
     session.clear()
     return redirect(url_for('index'))
 
+# --------------------------------------------------
+# Result fragments
+# --------------------------------------------------
+# The result box and recommendation lists depend only on (disease, result),
+# so each pair is rendered once, split around the doctor card slot, and
+# kept in RESULT_FRAGMENTS. Doctor cards are rendered once per doctor, and
+# a response is head + card + tail. The same HTML is also served from a
+# GET URL carrying its content hash, so browsers can cache it.
+RESULT_FRAGMENTS = {}
+DOCTOR_CARDS = {}
+_DOCTOR_SLOT = '<!-- doctor-card -->'
+
+def result_fragment(disease_name, result):
+    """(head, tail) HTML around the doctor card for a prediction result; rendered on first use"""
+    key = (disease_name, result)
+    cached = RESULT_FRAGMENTS.get(key)
+    if cached is None:
+        suggestion_block = SUGGESTIONS.get(disease_name, {}).get(result, {})
+        html = render_template(
+            'fragments/prediction_result.html',
+            disease_name=disease_name,
+            result=result,
+            clinical=suggestion_block.get('clinical', []),
+            herbal=suggestion_block.get('herbal', []),
+            doctor_card=Markup(_DOCTOR_SLOT),
+        )
+        head, _, tail = html.partition(_DOCTOR_SLOT)
+        cached = (head, tail)
+        RESULT_FRAGMENTS[key] = cached
+    return cached
+
+def doctor_card(doctor):
+    """Rendered doctor card; re-rendered only if the directory entry changes"""
+    key = tuple(sorted(doctor.items()))
+    card = DOCTOR_CARDS.get(key)
+    if card is None:
+        card = render_template('fragments/doctor_card.html', doctor=doctor)
+        DOCTOR_CARDS[key] = card
+    return card
+
+def result_html(disease_name, result, doctor=None):
+    head, tail = result_fragment(disease_name, result)
+    return head + doctor_card(doctor) + tail if doctor else head + tail
+
+def result_fragment_url(disease_name, result, html, doctor=None):
+    return url_for('prediction_result', disease_name=disease_name, result=result,
+                   doctor=doctor['id'] if doctor else None,
+                   v=hashlib.sha1(html.encode('utf-8')).hexdigest()[:16])
+
+@app.route('/predict/<disease_name>/result/<result>')
+def prediction_result(disease_name, result):
+    """Cached result fragment (see result_fragment_url)"""
+    if disease_name not in RULE_BASED and disease_name not in ML_DISEASES:
+        abort(404)
+    if result not in ("Normal", "Risky"):
+        abort(404)
+    doctor = None
+    doctor_id = request.args.get('doctor', type=int)
+    if doctor_id is not None:
+        doctor = DOCTOR_DIRECTORY.get(doctor_id)
+        if doctor is None:
+            abort(404)
+
+    body = result_html(disease_name, result, doctor).encode('utf-8')
+    response = Response(body, mimetype='text/html')
+    response.set_etag(hashlib.sha1(body).hexdigest())
+    response.cache_control.private = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
+
+def warm_result_fragments():
+    """Pre-render every (disease, result) pair that has suggestions, and every doctor card"""
+    with app.test_request_context():
+        for disease_name, results in SUGGESTIONS.items():
+            for result in results:
+                result_fragment(disease_name, result)
+        for doctor in DOCTOR_DIRECTORY.all():
+            doctor_card(doctor)
+
 # --------------------------------------------------
 # Prediction route
 # --------------------------------------------------
+def rule_result(disease_name, inputs):
+    """Rule-based result, cached on the parsed values and the range-table version"""
+    rules = RULE_ENGINE[disease_name]
+    values = rules.vector(inputs)
+    if values is None:
+        return rules.predict_values(None)
+    key = feature_key(values)
+    result = PREDICTION_CACHE.get('rule', disease_name, RULES_VERSION, key)
+    if result is None:
+        result = rules.predict_values(values)
+        PREDICTION_CACHE.put('rule', disease_name, RULES_VERSION, key, result)
+    return result
+
+
+def model_prediction(disease_name, components, inputs):
+    """
+    (label, P(Risky)) for one submission, cached on the encoded feature
+    vector and the model's load generation (a reload invalidates)
+    """
+    X = encode_features(disease_name, inputs)
+    key = feature_key(X)
+    version = components.get('generation')
+    cached = PREDICTION_CACHE.get('ml', disease_name, version, key)
+    if cached is None:
+        label, prob = ML_BATCHER.predict(disease_name, components, X)
+        cached = (int(label), float(prob))
+        PREDICTION_CACHE.put('ml', disease_name, version, key, cached)
+    return cached
+
+
 @app.route('/predict/<disease_name>', methods=['POST'])
 def predict(disease_name):
     inputs = request.form.to_dict()
 
     # ---------- RULE BASED ----------
     if disease_name in RULE_BASED:
-        result = RULE_BASED[disease_name](inputs)
+        result = rule_result(disease_name, inputs)
 
     # ---------- ML BASED ----------
     elif disease_name in ML_DISEASES:
-        components = MODEL_COMPONENTS.get(disease_name)
+        components = get_model_components(disease_name)
         if not components:
             return jsonify({'status': 'error', 'error': f'Model for {disease_name} not found.'})
 
-        features = MODEL_FEATURES[disease_name]
-        X_dict = {}
-
-        for f in features:
-            try:
-                X_dict[f] = [float(inputs.get(f, 0))]
-            except:
-                X_dict[f] = [0.0]
-
-        X_df = pd.DataFrame(X_dict)
-        X_imputed = components['imputer'].transform(X_df)
-        X_scaled = components['scaler'].transform(X_imputed)
-
-        pred = components['model'].predict(X_scaled)[0]
-        prob = components['model'].predict_proba(X_scaled)[0][1]
+        pred, prob = model_prediction(disease_name, components, inputs)
 
         # ---------- STEP 4: MEDICAL SANITY LOGIC (KIDNEY ONLY) ----------
-   
         if disease_name == 'kidney':
-            try:
-                sg = float(inputs.get('sg', 0))
-                al = float(inputs.get('al', 0))
-                rbc = float(inputs.get('rbc', 0))
-                pc = float(inputs.get('pc', 0))
-                hemo = float(inputs.get('hemo', 0))
-                wc = float(inputs.get('wc', 0))
-                rc = float(inputs.get('rc', 0))
-                bp = float(inputs.get('bp', 0))
-            except:
-                result = "Risky"
-            else:
-                # Kidney normal ranges
-                if sg < 1.005 or sg > 1.030:
-                    result = "Risky"
-                elif al > 2:
-                    result = "Risky"
-                elif rbc < 3.5 or rbc > 5.5:
-                    result = "Risky"
-                elif pc < 150 or pc > 450:
-                    result = "Risky"
-                elif hemo < 13.5 or hemo > 17.5:
-                    result = "Risky"
-                elif wc < 4000 or wc > 11000:
-                    result = "Risky"
-                elif rc < 4.2 or rc > 5.4:
-                    result = "Risky"
-                elif bp < 90 or bp > 140:
-                    result = "Risky"
-                else:
-                    result = "Normal"
+            result = kidney_sanity_rule(inputs)
         else:
             result = "Normal" if pred == 0 else "Risky"
 
     else:
         return jsonify({'status': 'error', 'error': 'Disease not recognized.'})
 
-    # ---------- SUGGESTIONS ----------
-    suggestion_block = SUGGESTIONS.get(disease_name, {}).get(result, {})
-    clinical = suggestion_block.get('clinical', [])
-    herbal = suggestion_block.get('herbal', [])
-
-    # ---------- GET RECOMMENDED DOCTOR (ONLY IF RISKY) ----------
-    doctor_html = ""
-    if result == "Risky":
-        recommended_doctor = get_recommended_doctor(disease_name)
-        doctor_html = f"""
-        <div class="doctor-recommendation-card">
-            <h4><i class="fas fa-stethoscope"></i> Recommended Specialist</h4>
-            <div class="doctor-info">
-                <p><strong>{recommended_doctor['name']}</strong></p>
-                <p style="color: var(--color-secondary); font-weight: 600;">{recommended_doctor['specialty']}</p>
-                <p><strong>Experience:</strong> {recommended_doctor['experience']}</p>
-                <p><strong>Contact:</strong> {recommended_doctor['phone']}</p>
-                <div style="margin-top: 12px;">
-                    <a href="tel:{recommended_doctor['phone']}" class="btn secondary small" style="margin-right: 8px;"><i class="fas fa-phone"></i> Call</a>
-                    <a href="{url_for('consult')}" class="btn primary small"><i class="fas fa-calendar"></i> View All Doctors</a>
-                </div>
-            </div>
-        </div>
-        """
-
     # ---------- SAVE PREDICTION ----------
     user_id = session.get('user_id')
     if user_id:
-        conn = get_db_connection()
-        conn.execute(
-            "INSERT INTO predictions (user_id, disease, input_data, result) VALUES (?, ?, ?, ?)",
-            (user_id, disease_name, str(inputs), result)
-        )
-        conn.commit()
-        conn.close()
-
-    # ---------- STYLED HTML OUTPUT ----------
-    html = f"""
-    <div class="result-box {'normal-box' if result=='Normal' else 'risk-box'}">
-        <h3>{disease_name.title()} Prediction</h3>
-        <p class="result-text">{result}</p>
-    </div>
-
-    <div class="recommendation-grid">
-        <div class="recommendation-card clinical-card">
-            <h4>Clinical Recommendations</h4>
-            <ul>
-                {''.join(f"<li>{c}</li>" for c in clinical)}
-            </ul>
-        </div>
-
-        <div class="recommendation-card herbal-card">
-            <h4>Herbal & Lifestyle Support</h4>
-            <ul>
-                {''.join(f"<li>{h}</li>" for h in herbal)}
-            </ul>
-        </div>
-    </div>
-
-    {doctor_html}
-
-    <p class="disclaimer">
-        Herbal suggestions are supportive only and do not replace medical treatment.
-    </p>
+        HISTORY_WRITER.submit([(user_id, disease_name, inputs, result)])
+
+    # ---------- CACHED HTML OUTPUT ----------
+    doctor = get_recommended_doctor(disease_name) if result == "Risky" else None
+    html = result_html(disease_name, result, doctor)
+    return jsonify({
+        'status': 'success',
+        'result': result,
+        'html': html,
+        'html_url': result_fragment_url(disease_name, result, html, doctor),
+    })
+
+
+# --------------------------------------------------
+# Batch prediction route
+# --------------------------------------------------
+BATCH_MAX_ROWS = int(os.environ.get("BATCH_MAX_ROWS", 10000))
+
+
+def read_batch_rows():
+    """
+    Read batch rows from the request.
+    Accepts a JSON array of objects (or {"rows": [...]}) or a CSV upload
+    in the 'file' field. Values are normalised to strings so every row
+    looks exactly like a single request.form submission. At most
+    BATCH_MAX_ROWS + 1 rows are read, enough to tell the batch is too large.
+    """
+    if 'file' in request.files:
+        stream = io.TextIOWrapper(request.files['file'].stream, encoding='utf-8-sig')
+        rows = list(itertools.islice(csv.DictReader(stream), BATCH_MAX_ROWS + 1))
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('rows')
+        if not isinstance(data, list):
+            raise ValueError("Expected a JSON array of objects or a CSV file upload.")
+        rows = data[:BATCH_MAX_ROWS + 1]
+        if not all(isinstance(r, dict) for r in rows):
+            raise ValueError("Expected a JSON array of objects or a CSV file upload.")
+
+    return [
+        {str(k): ('' if v is None else str(v)) for k, v in row.items() if k is not None}
+        for row in rows
+    ]
+
+
+def predict_ml_batch(disease_name, components, rows):
+    """
+    Run the fused imputer/scaler -> model chain over all rows in one pass.
+    Returns (results, probabilities) lists aligned with rows.
     """
+    X = encode_rows(disease_name, rows)
+    X_scaled = components['preprocess'].transform(X, copy=False)
+
+    preds, probs = predict_with_threshold(components, X_scaled)
+
+    if disease_name == 'kidney':
+        results = RULE_ENGINE['kidney_sanity'].predict(rows)
+    else:
+        results = ["Normal" if p == 0 else "Risky" for p in preds]
 
-    return jsonify({'status': 'success', 'html': html})
+    return results, [float(p) for p in probs]
+
+
+@app.route('/predict/<disease_name>/batch', methods=['POST'])
+def predict_batch(disease_name):
+    """Score many patients per call (JSON array or CSV upload)"""
+    if disease_name not in RULE_BASED and disease_name not in ML_DISEASES:
+        return jsonify({'status': 'error', 'error': 'Disease not recognized.'})
+
+    try:
+        rows = read_batch_rows()
+    except RequestEntityTooLarge:
+        return jsonify({'status': 'error', 'error': f'Request too large (max {app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)} MB).'}), 413
+    except Exception as e:
+        return jsonify({'status': 'error', 'error': f'Invalid batch input: {e}'})
 
+    if not rows:
+        return jsonify({'status': 'error', 'error': 'No rows supplied.'})
+    if len(rows) > BATCH_MAX_ROWS:
+        return jsonify({'status': 'error', 'error': f'Batch too large (max {BATCH_MAX_ROWS} rows).'})
 
+    probabilities = None
+    fired_rules = None
+
+    # ---------- RULE BASED (VECTORIZED) ----------
+    if disease_name in RULE_BASED:
+        explained = RULE_ENGINE[disease_name].explain(rows)
+        results = [result for result, _ in explained]
+        fired_rules = [rule for _, rule in explained]
+
+    # ---------- ML BASED ----------
+    else:
+        components = get_model_components(disease_name)
+        if not components:
+            return jsonify({'status': 'error', 'error': f'Model for {disease_name} not found.'})
+        results, probabilities = predict_ml_batch(disease_name, components, rows)
+
+    # ---------- SAVE PREDICTIONS (ONE TRANSACTION) ----------
+    user_id = session.get('user_id')
+    if user_id:
+        HISTORY_WRITER.submit(
+            [(user_id, disease_name, inputs, result) for inputs, result in zip(rows, results)]
+        )
 
+    output = []
+    for i, result in enumerate(results):
+        item = {'row': i, 'result': result}
+        if probabilities is not None:
+            item['probability'] = probabilities[i]
+        if fired_rules is not None:
+            item['rule'] = fired_rules[i]
+        output.append(item)
+
+    return jsonify({
+        'status': 'success',
+        'disease': disease_name,
+        'count': len(output),
+        'risky': sum(1 for r in results if r == "Risky"),
+        'results': output
+    })
+
+
+warm_result_fragments()
 
 
 # --------------------------------------------------
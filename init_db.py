@@ -1,22 +1,16 @@
-import sqlite3
 import os
+import sys
 
-# Path to your database
-db_path = 'database.db'
-
-# Path to schema.sql
-schema_path = os.path.join(r'D:\Sanguine\Downloads\multi-disease-prediction2\multi-disease-prediction-main', 'schema.sql')
+from src.migrate import migrate, check_query_plans
 
-# Connect to SQLite
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
+# Path to your database
+db_path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get('DATABASE', 'database.db')
 
-# Read and execute schema
-with open(schema_path, 'r') as f:
-    sql_script = f.read()
+# Apply every pending migration in migrations/ (safe to re-run)
+applied = migrate(db_path)
 
-cursor.executescript(sql_script)
-conn.commit()
-conn.close()
+# Make sure the history queries are served by their indexes
+for label, (ok, plan) in check_query_plans(db_path).items():
+    print(f"{'✓' if ok else '✗'} {label}: {' | '.join(plan)}")
 
-print("Database initialized successfully!")
+print("Database initialized successfully!" if applied else "Database already up to date.")
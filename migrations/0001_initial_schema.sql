@@ -0,0 +1,70 @@
+-- migrations/0001_initial_schema.sql
+-- Base tables (previously duplicated in schema.sql, init_db.py and app.init_db)
+
+-- User Authentication Table
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password_hash BLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Prediction History Table
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    disease TEXT NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    input_data TEXT, -- input parameters
+    result TEXT NOT NULL, -- Normal, Risky
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Contact Form Messages Table
+CREATE TABLE IF NOT EXISTS contact (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    message TEXT NOT NULL,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Consultations Table
+CREATE TABLE IF NOT EXISTS consultations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    predicted_disease TEXT NOT NULL,
+    risk_status TEXT NOT NULL,
+    primary_symptoms TEXT NOT NULL,
+    recommended_specialist TEXT NOT NULL,
+    hospital_name TEXT NOT NULL,
+    hospital_address TEXT NOT NULL,
+    consultation_date TEXT NOT NULL,
+    notes TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (id)
+);
+
+-- Appointments Table
+CREATE TABLE IF NOT EXISTS appointments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doctor_name TEXT NOT NULL,
+    patient_name TEXT NOT NULL,
+    patient_email TEXT NOT NULL,
+    patient_phone TEXT NOT NULL,
+    appointment_date TEXT NOT NULL,
+    appointment_time TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Consultation Intents Table (lightweight, offline consultation requests)
+CREATE TABLE IF NOT EXISTS consultation_intents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    doctor_name TEXT NOT NULL,
+    patient_name TEXT NOT NULL,
+    mobile_number TEXT NOT NULL,
+    expected_visit_window TEXT NOT NULL,
+    problem_summary TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
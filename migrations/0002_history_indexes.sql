@@ -0,0 +1,15 @@
+-- migrations/0002_history_indexes.sql
+-- Secondary indexes for per-user history and per-doctor lookups
+
+-- /dashboard: WHERE user_id=? ORDER BY timestamp DESC (no scan, no sort)
+CREATE INDEX IF NOT EXISTS idx_predictions_user_time
+    ON predictions (user_id, timestamp DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_consultations_user_time
+    ON consultations (user_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date
+    ON appointments (doctor_name, appointment_date);
+
+CREATE INDEX IF NOT EXISTS idx_consultation_intents_doctor_time
+    ON consultation_intents (doctor_name, created_at DESC);
@@ -0,0 +1,16 @@
+-- migrations/0003_prediction_features.sql
+-- One row per (prediction, MODEL_FEATURES feature) for SQL cohort queries
+
+CREATE TABLE IF NOT EXISTS prediction_features (
+    prediction_id INTEGER NOT NULL,
+    disease TEXT NOT NULL,
+    feature TEXT NOT NULL,
+    value_num REAL,            -- NULL when the value is not numeric
+    value_text TEXT NOT NULL,  -- value as submitted
+    PRIMARY KEY (prediction_id, feature),
+    FOREIGN KEY (prediction_id) REFERENCES predictions (id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- "kidney predictions with hemo < 12": range scan on (disease, feature, value_num)
+CREATE INDEX IF NOT EXISTS idx_prediction_features_value
+    ON prediction_features (disease, feature, value_num);
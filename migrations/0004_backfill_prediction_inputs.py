@@ -0,0 +1,30 @@
+# migrations/0004_backfill_prediction_inputs.py
+#
+# Rewrite legacy input_data (Python dict repr) as canonical JSON and fill
+# prediction_features for every existing prediction.
+
+from src.prediction_inputs import canonical_json, insert_features, parse_stored_inputs
+
+CHUNK_SIZE = 1000
+
+
+def upgrade(conn):
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, disease, input_data FROM predictions WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, CHUNK_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+        for prediction_id, disease, input_data in rows:
+            inputs = parse_stored_inputs(input_data)
+            if inputs is None:
+                continue
+            canonical = canonical_json(inputs)
+            if canonical != input_data:
+                conn.execute(
+                    "UPDATE predictions SET input_data = ? WHERE id = ?", (canonical, prediction_id)
+                )
+            insert_features(conn, prediction_id, disease, inputs)
+        last_id = rows[-1][0]
@@ -0,0 +1,15 @@
+-- migrations/0005_prediction_outcomes.sql
+-- Confirmed diagnoses for logged predictions (labels for incremental retraining)
+
+CREATE TABLE IF NOT EXISTS prediction_outcomes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,       -- retraining watermark
+    prediction_id INTEGER NOT NULL UNIQUE,
+    disease TEXT NOT NULL,
+    outcome INTEGER NOT NULL CHECK (outcome IN (0, 1)),  -- 0 = Normal, 1 = Risky
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (prediction_id) REFERENCES predictions (id) ON DELETE CASCADE
+);
+
+-- "new outcomes for <disease> since the last retrain"
+CREATE INDEX IF NOT EXISTS idx_prediction_outcomes_disease_id
+    ON prediction_outcomes (disease, id);
@@ -1,77 +1,148 @@
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import copy
+import functools
+import sqlite3
+import time
 import pandas as pd
 import numpy as np
-import pickle
 import os
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.impute import SimpleImputer
 from sklearn.metrics import accuracy_score, roc_auc_score, f1_score
+from sklearn.model_selection import StratifiedKFold
+from joblib import Parallel, delayed
+from src import artifacts
+from src.benchmark import benchmark_components, serving_components
 
-# --- Define Features for all 7 Diseases ---
-MODEL_FEATURES = {
-
-    'diabetes': [
-        'Pregnancies',
-        'Glucose',
-        'BloodPressure',
-        'BMI',
-        'Age'
-    ],
-
-    'kidney': [
-        'sg',
-        'al',
-        'rbc',
-        'pc',
-        'hemo',
-        'wc',
-        'rc',
-        'bp'
-    ],
-
-    'liver': [
-        'Age',
-        'Gender',
-        'Total_Bilirubin',
-        'Direct_Bilirubin',
-        'Alkaline_Phosphotase',
-        'Alamine_Aminotransferase',
-        'Aspartate_Aminotransferase'
-    ],
-
-    'malaria': [
-        'Temperature',
-        'Headache',
-        'Vomiting',
-        'JointPain',
-        'RBC'
-    ],
-
-    'thyroid': [
-        'Age',
-        'Sex',
-        'TSH',
-        'T3',
-        'T4',
-        'Thyroxine'
-    ],
-
-    'pneumonia': [
-        'Age',
-        'CoughSeverity',
-        'WBC',
-        'OxygenSaturation',
-        'Fever'
-    ]
+# --- Features for all diseases live in src/features.py (re-exported here) ---
+from src.features import MODEL_FEATURES
+
+
+# --- Decision threshold on P(Risky) per disease (saved in the artifact manifest) ---
+DEFAULT_THRESHOLD = 0.5
+DECISION_THRESHOLDS = {
+    'diabetes': 0.5,
+    'kidney': 0.5,
+    'liver': 0.5,
 }
 
 
-def create_and_save_reliable_model(disease_name, features):
+CV_FOLDS = 5
+RF_PARAMS = dict(n_estimators=200, max_depth=12, random_state=42, class_weight='balanced')
+
+
+def score(y, y_prob, threshold):
+    y_pred = (y_prob > threshold).astype(int)
+    return {
+        'accuracy': float(accuracy_score(y, y_pred)),
+        'f1': float(f1_score(y, y_pred)),
+        'auc': float(roc_auc_score(y, y_prob)),
+    }
+
+
+def _fit_fold(X, y, train_idx, test_idx):
+    """Fit imputer, scaler and forest on one training split; P(Risky) on the held-out rows"""
+    imputer = SimpleImputer(strategy='mean')
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(imputer.fit_transform(X.iloc[train_idx]))
+    model = RandomForestClassifier(**RF_PARAMS, n_jobs=1)
+    model.fit(X_train, y.iloc[train_idx])
+    X_test = scaler.transform(imputer.transform(X.iloc[test_idx]))
+    return test_idx, model.predict_proba(X_test)[:, 1]
+
+
+def _grow_fold(model, new_trees, X, y, train_idx, test_idx):
+    """Add new_trees fitted on one training split to a copy of model; P(Risky) on the held-out rows"""
+    fold_model = copy.deepcopy(model)
+    grow_forest(fold_model, X.iloc[train_idx], y.iloc[train_idx], new_trees, n_jobs=1)
+    return test_idx, fold_model.predict_proba(X.iloc[test_idx])[:, 1]
+
+
+def cross_validate(X, y, threshold, folds=CV_FOLDS, n_jobs=None, fit_fold=_fit_fold):
+    """
+    Stratified k-fold evaluation, folds fitted in parallel (n_jobs threads).
+    fit_fold(X, y, train_idx, test_idx) -> (test_idx, P(Risky)); the default
+    refits preprocessing per fold so held-out rows never leak in.
+    Returns metrics on the out-of-fold probabilities plus per-fold scores.
+    """
+    folds = max(2, min(folds, int(y.value_counts().min())))
+    splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    results = Parallel(n_jobs=n_jobs or 1, prefer="threads")(
+        delayed(fit_fold)(X, y, train_idx, test_idx)
+        for train_idx, test_idx in splitter.split(X, y)
+    )
+
+    oof = np.empty(len(y))
+    per_fold = []
+    for test_idx, prob in results:
+        oof[test_idx] = prob
+        per_fold.append(score(y.iloc[test_idx], prob, threshold))
+
+    metrics = score(y, oof, threshold)
+    metrics['folds'] = folds
+    metrics['auc_std'] = float(np.std([fold['auc'] for fold in per_fold]))
+    return metrics, per_fold
+
+
+def benchmark_and_gate(model, imputer, scaler, fields, X, metrics, min_auc=None, max_p99_ms=None):
+    """
+    Benchmark the serving path for a fitted model on raw rows X and apply
+    the deployment gates to it. Returns (benchmark, gates, published).
+    """
+    benchmark = benchmark_components(serving_components(model, imputer, scaler, fields),
+                                     np.asarray(X, dtype=np.float64))
+    print(f"  > Inference: p50={benchmark['single_row_ms']['p50']:.3f}ms, "
+          f"p99={benchmark['single_row_ms']['p99']:.3f}ms, "
+          f"batch={benchmark['batch']['rows_per_sec']:.0f} rows/s")
+
+    gates = {}
+    if min_auc is not None:
+        gates['min_auc'] = {'limit': min_auc, 'value': metrics['auc'],
+                            'passed': metrics['auc'] >= min_auc}
+    if max_p99_ms is not None:
+        p99 = benchmark['single_row_ms']['p99']
+        gates['max_p99_ms'] = {'limit': max_p99_ms, 'value': p99, 'passed': p99 <= max_p99_ms}
+    return benchmark, gates, all(gate['passed'] for gate in gates.values())
+
+
+def print_published(disease_name, manifest, gates, published):
+    if published:
+        print(f"Successfully created and saved {disease_name} artifact v{manifest['version']:04d}.")
+    else:
+        failed = ', '.join(name for name, gate in gates.items() if not gate['passed'])
+        print(f"✗ {disease_name} artifact v{manifest['version']:04d} saved but NOT published "
+              f"(failed gate: {failed}).")
+
+
+def model_manifest_fields(disease_name, features, metrics, **extra):
+    """
+    Manifest entries read by the app at inference time.
+    extra: additional fields (watermark, ...) stored as-is.
+    """
+    fields = {
+        'features': list(features),
+        'positive_class': 1,
+        'threshold': DECISION_THRESHOLDS.get(disease_name, DEFAULT_THRESHOLD),
+        'metrics': metrics,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    fields.update(extra)
+    return fields
+
+
+def create_and_save_reliable_model(disease_name, features, n_jobs=None, min_auc=None,
+                                   max_p99_ms=None):
     """
     Creates ML models.
     - Uses REAL CSV for kidney
     - Uses simulated data for others
+    - n_jobs: cores used for the CV folds and the final forest (None = 1)
+    - min_auc / max_p99_ms: deployment gates; a model that misses one is
+      saved as a new version but CURRENT is not switched to it
+    Returns the report written next to the model (report.json).
     """
 
     print(f"Creating model for {disease_name}...")
@@ -137,6 +208,15 @@ def create_and_save_reliable_model(disease_name, features):
         X = df[features]
         y = df['Outcome']
 
+    # ============================================================
+    # HELD-OUT EVALUATION (stratified k-fold)
+    # ============================================================
+    threshold = DECISION_THRESHOLDS.get(disease_name, DEFAULT_THRESHOLD)
+    metrics, per_fold = cross_validate(X, y, threshold, n_jobs=n_jobs)
+
+    print(f"  > {metrics['folds']}-fold CV: Acc={metrics['accuracy']:.3f}, "
+          f"F1={metrics['f1']:.3f}, AUC={metrics['auc']:.3f} (±{metrics['auc_std']:.3f})")
+
     # ============================================================
     # PREPROCESSING
     # ============================================================
@@ -147,52 +227,261 @@ def create_and_save_reliable_model(disease_name, features):
     X_scaled = scaler.fit_transform(X_imputed)
 
     # ============================================================
-    # MODEL TRAINING
+    # MODEL TRAINING (all rows)
     # ============================================================
-    model = RandomForestClassifier(
-        n_estimators=200,
-        max_depth=12,
-        random_state=42,
-        class_weight='balanced'
-    )
+    model = RandomForestClassifier(**RF_PARAMS, n_jobs=n_jobs)
     model.fit(X_scaled, y)
+    # Serve single-threaded; the app parallelises across requests instead
+    model.n_jobs = None
 
     # ============================================================
-    # SAFE EVALUATION
+    # INFERENCE BENCHMARK (serving path: fused preprocessing + flat forest)
     # ============================================================
-    y_pred = model.predict(X_scaled)
-    y_prob = model.predict_proba(X_scaled)[:, 1]
-
-    accuracy = accuracy_score(y, y_pred)
-    f1 = f1_score(y, y_pred)
-    auc = roc_auc_score(y, y_prob)
-
-    print(f"  > Metrics: Acc={accuracy:.3f}, F1={f1:.3f}, AUC={auc:.3f}")
+    fields = model_manifest_fields(disease_name, features, metrics, watermark={'outcome_id': 0})
+    benchmark, gates, published = benchmark_and_gate(model, imputer, scaler, fields, X, metrics,
+                                                     min_auc, max_p99_ms)
+
+    report = {
+        'disease': disease_name,
+        'evaluation': {**metrics, 'threshold': threshold, 'per_fold': per_fold},
+        'benchmark': benchmark,
+        'gates': gates,
+        'published': published,
+    }
 
     # ============================================================
-    # SAVE MODEL FILES
+    # SAVE MODEL ARTIFACT
     # ============================================================
-    model_dir = "models"
-    os.makedirs(model_dir, exist_ok=True)
+    # models/<disease>/vNNNN: memory-mappable arrays + manifest + report;
+    # the sklearn objects are kept as a checkpoint for incremental retraining.
+    # A full retrain re-reads logged outcomes from the start (watermark 0)
+    manifest = artifacts.save_artifact(
+        disease_name, model, imputer, scaler, fields, model_dir="models",
+        reports={'report.json': report}, publish=published,
+    )
+    report['version'] = manifest['version']
+    print_published(disease_name, manifest, gates, published)
+    return report
+
+
+# ============================================================
+# INCREMENTAL RETRAINING (confirmed outcomes from the app database)
+# ============================================================
+def load_new_outcomes(database, disease_name, features, since_id=0):
+    """
+    Labeled rows recorded after the watermark, from prediction_outcomes
+    joined to prediction_features. Returns (X, y, last_outcome_id); X uses
+    NaN for features that were not submitted.
+    """
+    column = {feature: j for j, feature in enumerate(features)}
+    conn = sqlite3.connect(database)
+    try:
+        cursor = conn.execute(
+            "SELECT o.id, o.outcome, f.feature, f.value_num "
+            "FROM prediction_outcomes o "
+            "LEFT JOIN prediction_features f ON f.prediction_id = o.prediction_id "
+            "WHERE o.disease = ? AND o.id > ? ORDER BY o.id",
+            (disease_name, since_id),
+        )
+        ids, labels, rows = [], [], []
+        for outcome_id, outcome, feature, value in cursor:
+            if not ids or ids[-1] != outcome_id:
+                ids.append(outcome_id)
+                labels.append(outcome)
+                rows.append(np.full(len(features), np.nan))
+            if feature in column and value is not None:
+                rows[-1][column[feature]] = value
+    finally:
+        conn.close()
+
+    X = np.vstack(rows) if rows else np.empty((0, len(features)))
+    return X, np.asarray(labels, dtype=int), (ids[-1] if ids else since_id)
+
+
+def grow_forest(model, X, y, new_trees, n_jobs=None):
+    """Add new_trees trees fitted on (X, y) to a fitted forest; existing trees are kept"""
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees, n_jobs=n_jobs)
+    model.fit(X, y)
+    model.set_params(warm_start=False, n_jobs=None)
+
+
+def update_model_incrementally(disease_name, features, database, new_trees=20, min_rows=20,
+                               n_jobs=None, model_dir="models", min_auc=None, max_p99_ms=None):
+    """
+    Grow an existing forest with `new_trees` trees fitted on outcomes
+    recorded since the watermark in the current artifact's manifest
+    (warm_start), and save the result as a new artifact version.
+    The imputer/scaler are reused unchanged so old trees stay valid.
+    Metrics are stratified k-fold on the new rows (each fold grows a copy
+    of the current forest on the other folds); the same benchmark and
+    deployment gates as a full training decide whether CURRENT switches.
+    Returns the report, or None if there was too little new data (the
+    watermark is then left where it was).
+    """
+    version_dir = artifacts.current_path(disease_name, model_dir)
+    if version_dir is None:
+        print(f"Incremental update for {disease_name}: no model artifact, run a full training first")
+        return None
+    meta = artifacts.read_manifest(version_dir)
+    since_id = meta.get('watermark', {}).get('outcome_id', 0)
+
+    X, y, last_id = load_new_outcomes(database, disease_name, features, since_id)
+    print(f"Incremental update for {disease_name}: {len(y)} new labeled rows since outcome {since_id}")
+    if len(y) < min_rows or len(np.unique(y)) < 2 or np.bincount(y).min() < 2:
+        print(f"  > Skipped: need at least {min_rows} rows with two or more of each class")
+        return None
+
+    checkpoint = artifacts.load_checkpoint(version_dir)
+    model, scaler, imputer = checkpoint['model'], checkpoint['scaler'], checkpoint['imputer']
+
+    X_scaled = pd.DataFrame(scaler.transform(imputer.transform(pd.DataFrame(X, columns=features))))
+    y = pd.Series(y)
+
+    # Keep a threshold that was tuned in the manifest
+    threshold = meta.get('threshold', DECISION_THRESHOLDS.get(disease_name, DEFAULT_THRESHOLD))
+    metrics, per_fold = cross_validate(X_scaled, y, threshold, n_jobs=n_jobs,
+                                       fit_fold=functools.partial(_grow_fold, model, new_trees))
+    metrics['rows'] = int(len(y))
+    print(f"  > {metrics['folds']}-fold CV on new rows: Acc={metrics['accuracy']:.3f}, "
+          f"F1={metrics['f1']:.3f}, AUC={metrics['auc']:.3f}")
+
+    # Existing trees are kept; only the added ones see the new rows
+    grow_forest(model, X_scaled, y, new_trees, n_jobs=n_jobs)
+
+    fields = model_manifest_fields(disease_name, features, metrics, threshold=threshold,
+                                   watermark={'outcome_id': int(last_id)})
+    benchmark, gates, published = benchmark_and_gate(model, imputer, scaler, fields, X, metrics,
+                                                     min_auc, max_p99_ms)
+    report = {
+        'disease': disease_name,
+        'base_version': meta.get('version'),
+        'evaluation': {**metrics, 'threshold': threshold, 'per_fold': per_fold},
+        'benchmark': benchmark,
+        'gates': gates,
+        'published': published,
+    }
+
+    # Unpublished versions leave CURRENT (and so the watermark) where it
+    # was, so the same rows are retried on the next run
+    manifest = artifacts.save_artifact(
+        disease_name, model, imputer, scaler, fields, model_dir=model_dir,
+        reports={'report.json': report}, publish=published,
+    )
+    report['version'] = manifest['version']
+    print(f"  > {len(model.estimators_)} trees")
+    print_published(disease_name, manifest, gates, published)
+    return report
 
-    with open(os.path.join(model_dir, f"{disease_name}_model.pkl"), "wb") as f:
-        pickle.dump(model, f)
 
-    with open(os.path.join(model_dir, f"{disease_name}_scaler.pkl"), "wb") as f:
-        pickle.dump(scaler, f)
+def _train_one(disease_name, features, n_jobs, gates):
+    started = time.perf_counter()
+    report = create_and_save_reliable_model(disease_name, features, n_jobs=n_jobs, **gates)
+    return report, time.perf_counter() - started
 
-    with open(os.path.join(model_dir, f"{disease_name}_imputer.pkl"), "wb") as f:
-        pickle.dump(imputer, f)
 
-    print(f"Successfully created and saved components for {disease_name}.")
+def plan_workers(n_diseases, cpu_budget=None, max_workers=None):
+    """
+    Split a core budget between a process per disease and forest n_jobs.
+    Returns (workers, n_jobs) with workers * n_jobs <= cpu_budget.
+    """
+    cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+    workers = max(1, min(n_diseases, max_workers or cpu_budget, cpu_budget))
+    return workers, max(1, cpu_budget // workers)
 
 
-if __name__ == "__main__":
+def train_all(diseases=None, cpu_budget=None, max_workers=None, min_auc=None, max_p99_ms=None):
+    """
+    Train several diseases in parallel: one process per disease, each forest
+    fitted with n_jobs cores, never exceeding cpu_budget cores in total.
+    min_auc / max_p99_ms are passed on as deployment gates.
+    Returns {disease: {'seconds': ..., 'report': ... or 'error': ...}}.
+    """
+    gates = {'min_auc': min_auc, 'max_p99_ms': max_p99_ms}
+    diseases = list(diseases or MODEL_FEATURES)
+    workers, n_jobs = plan_workers(len(diseases), cpu_budget, max_workers)
+    print(f"Training {len(diseases)} models: {workers} process(es) x {n_jobs} core(s) per forest")
+
+    report = {}
+    started = time.perf_counter()
+    if workers == 1:
+        for disease in diseases:
+            try:
+                result, seconds = _train_one(disease, MODEL_FEATURES[disease], n_jobs, gates)
+                report[disease] = {'seconds': seconds, 'report': result}
+            except Exception as e:
+                report[disease] = {'error': str(e)}
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_train_one, disease, MODEL_FEATURES[disease], n_jobs, gates): disease
+                for disease in diseases
+            }
+            for future in as_completed(futures):
+                disease = futures[future]
+                try:
+                    result, seconds = future.result()
+                    report[disease] = {'seconds': seconds, 'report': result}
+                except Exception as e:
+                    report[disease] = {'error': str(e)}
+
+    print(f"\n  {'disease':<10} {'time':>8} {'cv auc':>7} {'p99 ms':>7} {'rows/s':>9}")
+    for disease in diseases:
+        entry = report[disease]
+        if 'error' in entry:
+            print(f"  {disease:<10} FAILED: {entry['error']}")
+            continue
+        result = entry['report']
+        print(f"  {disease:<10} {entry['seconds']:7.2f}s {result['evaluation']['auc']:7.3f} "
+              f"{result['benchmark']['single_row_ms']['p99']:7.3f} "
+              f"{result['benchmark']['batch']['rows_per_sec']:9.0f}"
+              f"{'' if result['published'] else '  (not published)'}")
+    print(f"  {'total':<10} {time.perf_counter() - started:7.2f}s")
+    return report
 
-    for disease, features in MODEL_FEATURES.items():
-        create_and_save_reliable_model(disease, features)
 
-    with open("models/model_features.pkl", "wb") as f:
-        pickle.dump(MODEL_FEATURES, f)
+if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="Train disease models")
+    parser.add_argument("diseases", nargs="*", help="diseases to train (default: all)")
+    parser.add_argument("--cores", type=int, default=None,
+                        help="total core budget (default: all cores)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="max diseases trained at once (default: fit the budget)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="add trees fitted on outcomes logged since the last run")
+    parser.add_argument("--database", default=os.environ.get("DATABASE", "database.db"),
+                        help="app database with prediction outcomes (--incremental)")
+    parser.add_argument("--new-trees", type=int, default=20,
+                        help="trees added per incremental run")
+    parser.add_argument("--min-auc", type=float, default=None,
+                        help="only publish models whose cross-validated AUC is at least this")
+    parser.add_argument("--max-p99-ms", type=float, default=None,
+                        help="only publish models whose single-row p99 latency is at most this")
+    args = parser.parse_args()
+
+    unknown = [d for d in args.diseases if d not in MODEL_FEATURES]
+    if unknown:
+        parser.error(f"unknown disease(s): {', '.join(unknown)}")
+
+    if args.incremental:
+        rejected = []
+        for disease in args.diseases or MODEL_FEATURES:
+            if artifacts.current_path(disease, "models"):
+                result = update_model_incrementally(
+                    disease, MODEL_FEATURES[disease], args.database, new_trees=args.new_trees,
+                    n_jobs=args.cores, min_auc=args.min_auc, max_p99_ms=args.max_p99_ms,
+                )
+                if result is not None and not result['published']:
+                    rejected.append(disease)
+        if rejected:
+            raise SystemExit(f"\n✗ Not published (failed a deployment gate): {', '.join(rejected)}")
+        raise SystemExit(0)
+
+    report = train_all(args.diseases, cpu_budget=args.cores, max_workers=args.workers,
+                       min_auc=args.min_auc, max_p99_ms=args.max_p99_ms)
+
+    if any('error' in entry for entry in report.values()):
+        raise SystemExit("\n✗ ML Pipeline finished with errors.")
+    if not all(entry['report']['published'] for entry in report.values()):
+        raise SystemExit("\n✗ Some models failed a deployment gate and were not published.")
     print("\n✅ ML Pipeline execution complete. All models ready.")
@@ -0,0 +1,388 @@
+"""
+Vectorized range-table rule engine.
+
+Each disease's healthy ranges are declared once, in data/clinical_ranges.json,
+as a table of checks. The file is parsed once and compiled into per-check
+(column, comparison, bound) tuples holding both the NumPy ufunc used for
+batches and the scalar operator used for single rows. The app's rule
+functions, the kidney sanity check and the CSV relabeler
+(rule_based/relabel.py) all evaluate these tables, so serving and training
+labels cannot drift apart.
+
+A row is Risky as soon as any check fails, so evaluation short-circuits:
+single rows stop at the first failing check, and batches drop rows from
+the working set once they are Risky. Every check counts how often it was
+evaluated and how often it failed; every REORDER_EVERY rows the checks are
+re-sorted so the ones most likely to fail run first. The order only
+decides how fast a row is found Risky: the reported rule is always the
+first failing check in declared order, so explanations do not depend on
+earlier traffic.
+"""
+
+import hashlib
+import json
+import operator
+import os
+
+import numpy as np
+
+NORMAL = "Normal"
+RISKY = "Risky"
+
+# fired index reported for rows whose inputs could not be parsed
+INVALID_INPUT = -2
+NO_RULE = -1
+
+# rows evaluated between re-sorts of a disease's checks by hit rate
+REORDER_EVERY = 1000
+
+
+# ---------------------------
+# Input parsers (same conversions as the scalar rule functions)
+# ---------------------------
+def parse_float(value):
+    return float(value)
+
+
+def parse_float_text(value):
+    return float(str(value).strip())
+
+
+def parse_sex(value):
+    text = value.strip()
+    if text.lower() == 'male':
+        return 0
+    if text.lower() == 'female':
+        return 1
+    return int(text)
+
+
+def parse_thyroxine(value):
+    text = value.strip()
+    if text.lower() in ['normal', 'none', '0']:
+        return 0
+    if text.lower() in ['high', 'low', 'abnormal', '1']:
+        return 1
+    return int(text)
+
+
+def parse_symptom(value):
+    """None=0, Present=1, Severe=2 (malaria symptoms)"""
+    text = str(value).strip()
+    if text.lower() == 'none':
+        return 0
+    if text.lower() == 'present':
+        return 1
+    if text.lower() == 'severe':
+        return 2
+    return int(text)
+
+
+def parse_cough(value):
+    text = value.strip().lower()
+    if text == 'none':
+        return 0
+    if text == 'present':
+        return 1
+    return int(text)
+
+
+# ---------------------------
+# Range tables (data/clinical_ranges.json)
+# ---------------------------
+# features: {name, keys (input keys tried in order, default [name]),
+#            default (default 0), parse (a PARSERS name),
+#            unit_scale {below, factor} -> value if value > below else value * factor}
+# checks:   {label, feature, risky_if: [[op, bound], ...]} -> Risky if any comparison holds
+RANGES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "clinical_ranges.json")
+
+PARSERS = {
+    'float': parse_float,
+    'text_float': parse_float_text,
+    'sex': parse_sex,
+    'thyroxine': parse_thyroxine,
+    'symptom': parse_symptom,
+    'cough': parse_cough,
+}
+
+
+def load_rule_tables(path=RANGES_PATH):
+    """Returns (tables, version); version is a short hash of the file"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    return json.loads(raw), hashlib.sha256(raw).hexdigest()[:12]
+
+
+RULE_TABLES, RULES_VERSION = load_rule_tables()
+
+_OPS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '==': np.equal,
+}
+
+_SCALAR_OPS = {
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '==': operator.eq,
+}
+
+
+def _any_hit(comparisons, values):
+    """Boolean mask of values failing any of a check's comparisons"""
+    hit = comparisons[0][1](values, comparisons[0][2])
+    for _, op, bound in comparisons[1:]:
+        hit |= op(values, bound)
+    return hit
+
+
+# ---------------------------
+# Compiled rule set
+# ---------------------------
+class RuleSet:
+    """
+    A disease's range table compiled into per-check bounds, evaluated in
+    hit-rate order with per-check counters
+    """
+
+    def __init__(self, disease, table, reorder_every=REORDER_EVERY):
+        self.disease = disease
+        self.reorder_every = reorder_every
+        features = table['features']
+        self.features = [f['name'] for f in features]
+        # (input keys tried in order, default, parser) per feature
+        self.inputs = [
+            (tuple(f.get('keys', [f['name']])), f.get('default', 0), PARSERS[f['parse']])
+            for f in features
+        ]
+
+        index = {name: j for j, name in enumerate(self.features)}
+        scaled = [(index[f['name']], f['unit_scale']) for f in features if f.get('unit_scale')]
+        self.scale_columns = np.array([j for j, _ in scaled], dtype=np.intp)
+        self.scale_thresholds = np.array([s['below'] for _, s in scaled], dtype=np.float64)
+        self.scale_factors = np.array([s['factor'] for _, s in scaled], dtype=np.float64)
+        self._scalar_scale = [(j, float(s['below']), float(s['factor'])) for j, s in scaled]
+
+        # (check index, column, ((scalar op, numpy op, bound), ...)) in declared order
+        self.labels = [c['label'] for c in table['checks']]
+        self._checks = tuple(
+            (i, index[check['feature']], tuple(
+                (_SCALAR_OPS[op], _OPS[op], float(bound)) for op, bound in check['risky_if']
+            ))
+            for i, check in enumerate(table['checks'])
+        )
+        # Evaluation order; replaced as a whole by reorder() so readers that
+        # grabbed the old tuple finish with it
+        self._order = self._checks
+
+        # Plain counters: concurrent requests may occasionally lose an
+        # increment, which only nudges the ordering
+        self.evaluated = [0] * len(self._checks)
+        self.hits = [0] * len(self._checks)
+        self.rows = 0
+        self.reorders = 0
+        self._since_reorder = 0
+
+    def _parse(self, inputs):
+        """Feature values for one input dict (raises if a value does not parse)"""
+        values = []
+        for keys, default, parser in self.inputs:
+            key = next((k for k in keys if k in inputs), keys[-1])
+            values.append(parser(inputs.get(key, default)))
+        return values
+
+    def encode(self, rows):
+        """
+        rows: iterable of input dicts (request.form style)
+        Returns (X, invalid): float64 matrix in self.features order and a
+        boolean mask of rows whose inputs failed to parse.
+        """
+        rows = list(rows)
+        X = np.zeros((len(rows), len(self.features)), dtype=np.float64)
+        invalid = np.zeros(len(rows), dtype=bool)
+        for i, inputs in enumerate(rows):
+            try:
+                X[i] = self._parse(inputs)
+            except Exception:
+                invalid[i] = True
+        return X, invalid
+
+    def vector(self, inputs):
+        """Parsed feature values for one input dict, or None if it does not parse"""
+        try:
+            return self._parse(inputs)
+        except Exception:
+            return None
+
+    def check(self, inputs):
+        """
+        Scalar path for a single input dict. Returns the declared index of
+        the first check that failed, NO_RULE, or INVALID_INPUT.
+        """
+        values = self.vector(inputs)
+        if values is None:
+            return INVALID_INPUT
+        return self.check_values(values)
+
+    def check_values(self, values):
+        """check() for values already parsed by vector() (not modified)"""
+        values = list(values)
+        for j, below, factor in self._scalar_scale:
+            if not values[j] > below:
+                values[j] = values[j] * factor
+
+        fired = NO_RULE
+        evaluated, hits = self.evaluated, self.hits
+        order = self._order
+        for i, column, comparisons in order:
+            evaluated[i] += 1
+            value = values[column]
+            for op, _, bound in comparisons:
+                if op(value, bound):
+                    fired = i
+                    break
+            if fired != NO_RULE:
+                hits[i] += 1
+                break
+        self._count_rows(1)
+
+        if fired > 0 and order is not self._checks:
+            # Report the first failing check in declared order
+            for i, column, comparisons in self._checks[:fired]:
+                value = values[column]
+                if any(op(value, bound) for op, _, bound in comparisons):
+                    return i
+        return fired
+
+    def evaluate(self, X, invalid=None):
+        """
+        X: (n_rows, n_features) float matrix in self.features order
+        Returns (risky, fired): boolean Risky mask and the declared index of
+        the first check that failed per row (NO_RULE if Normal, INVALID_INPUT
+        if the row could not be parsed). Each check only looks at rows still
+        Normal; Risky rows are then re-checked in declared order for the
+        reported rule.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if len(self.scale_columns):
+            X = X.copy()
+            cols = X[:, self.scale_columns]
+            X[:, self.scale_columns] = np.where(
+                cols > self.scale_thresholds, cols, cols * self.scale_factors
+            )
+
+        fired = np.full(len(X), NO_RULE, dtype=np.intp)
+        if invalid is not None:
+            invalid = np.asarray(invalid, dtype=bool)
+            active = np.flatnonzero(~invalid)
+        else:
+            active = np.arange(len(X))
+
+        evaluated, hits = self.evaluated, self.hits
+        order = self._order
+        for i, column, comparisons in order:
+            if not len(active):
+                break
+            hit = _any_hit(comparisons, X[active, column])
+            n_hit = int(np.count_nonzero(hit))
+            evaluated[i] += len(active)
+            hits[i] += n_hit
+            if n_hit:
+                fired[active[hit]] = i
+                active = active[~hit]
+        self._count_rows(len(X))
+
+        if order is not self._checks:
+            # Report the first failing check in declared order
+            risky_rows = np.flatnonzero(fired > 0)
+            for i, column, comparisons in self._checks:
+                risky_rows = risky_rows[fired[risky_rows] > i]
+                if not len(risky_rows):
+                    break
+                hit = _any_hit(comparisons, X[risky_rows, column])
+                fired[risky_rows[hit]] = i
+
+        if invalid is not None:
+            fired[invalid] = INVALID_INPUT
+        return fired != NO_RULE, fired
+
+    # ---------------------------
+    # Hit-rate ordering
+    # ---------------------------
+    def _count_rows(self, n):
+        self.rows += n
+        self._since_reorder += n
+        if self._since_reorder >= self.reorder_every:
+            self.reorder()
+
+    def hit_rates(self):
+        """Failed / evaluated per check (declared order)"""
+        return [h / e if e else 0.0 for h, e in zip(self.hits, self.evaluated)]
+
+    def reorder(self):
+        """
+        Put the checks most likely to fail first. A check's rate is measured
+        on the rows that reached it, so later checks are not penalised for
+        being skipped; ties keep the declared order.
+        """
+        self._since_reorder = 0
+        rates = self.hit_rates()
+        order = tuple(sorted(self._checks, key=lambda check: (-rates[check[0]], check[0])))
+        if order != self._order:
+            self._order = self._checks if order == self._checks else order
+            self.reorders += 1
+
+    def stats(self):
+        rates = self.hit_rates()
+        return {
+            'rows': self.rows,
+            'reorders': self.reorders,
+            'order': [self.labels[i] for i, _, _ in self._order],
+            'checks': [
+                {'label': label, 'evaluated': self.evaluated[i], 'hits': self.hits[i],
+                 'hit_rate': round(rates[i], 4)}
+                for i, label in enumerate(self.labels)
+            ],
+        }
+
+    def predict_one(self, inputs):
+        """Return "Normal"/"Risky" for a single input dict"""
+        return NORMAL if self.check(inputs) == NO_RULE else RISKY
+
+    def predict_values(self, values):
+        """predict_one() for values from vector() (None = unparsable -> Risky)"""
+        if values is None:
+            return RISKY
+        return NORMAL if self.check_values(values) == NO_RULE else RISKY
+
+    def predict(self, rows):
+        """Return "Normal"/"Risky" for every row"""
+        risky, _ = self.evaluate(*self.encode(rows))
+        return [RISKY if r else NORMAL for r in risky]
+
+    def explain(self, rows):
+        """Return (result, fired rule label or None) for every row"""
+        risky, fired = self.evaluate(*self.encode(rows))
+        return [
+            (RISKY if r else NORMAL, self.rule_label(f))
+            for r, f in zip(risky, fired)
+        ]
+
+    def rule_label(self, fired):
+        if fired == INVALID_INPUT:
+            return "Invalid input"
+        if fired == NO_RULE:
+            return None
+        return self.labels[fired]
+
+
+RULE_ENGINE = {disease: RuleSet(disease, table) for disease, table in RULE_TABLES.items()}
+
+
+def rule_stats():
+    """Per-disease check counters and current evaluation order"""
+    return {disease: rules.stats() for disease, rules in RULE_ENGINE.items()}
@@ -0,0 +1,172 @@
+"""
+Relabel training CSVs from the clinical range tables.
+
+Replaces the per-disease update_*_csv.py scripts. Rows are labelled with
+the same compiled RuleSet the app uses (one vectorized pass per chunk, no
+per-row Python calls), files are streamed in fixed-size chunks so memory
+stays constant on multi-million-row exports, and output is written to a
+temporary file in the destination directory and renamed into place, so a
+crash never leaves a half-written CSV behind.
+
+    python -m rule_based.relabel                       (all data/<disease>_simple.csv)
+    python -m rule_based.relabel liver pneumonia
+    python -m rule_based.relabel kidney --input lis_export.csv --output kidney_labeled.csv
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from rule_based.engine import PARSERS, RULE_ENGINE
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+
+CHUNK_ROWS = 200_000
+STATUS_COLUMN = 'health_status'
+
+# Training target column kept in sync with health_status (None = only health_status)
+LABEL_COLUMNS = {
+    'kidney': 'classification',
+    'liver': 'Dataset',
+    'malaria': 'classification',
+    'pneumonia': 'classification',
+    'thyroid': None,
+}
+
+
+def default_path(disease):
+    return os.path.join(DATA_DIR, f"{disease}_simple.csv")
+
+
+# Parsers that are plain float(): numeric text converts in one pass
+_FLOAT_PARSERS = (PARSERS['float'], PARSERS['text_float'])
+
+
+def _parse_column(column, parser):
+    """
+    Parse one column with a feature's parser, exactly as the app parses a
+    form value. Returns (float64 values, boolean mask of unparsable cells).
+    """
+    column = column.fillna('')
+    if parser in _FLOAT_PARSERS:
+        try:
+            # Object -> float64 calls float() on every cell, in C
+            return column.to_numpy(dtype=object).astype(np.float64), None
+        except (TypeError, ValueError):
+            pass
+    # Each distinct cell is parsed once
+    codes, uniques = pd.factorize(column)
+    parsed = np.zeros(len(uniques), dtype=np.float64)
+    bad = np.zeros(len(uniques), dtype=bool)
+    for k, cell in enumerate(uniques):
+        try:
+            parsed[k] = parser(cell)
+        except Exception:
+            bad[k] = True
+    return parsed[codes], bad[codes]
+
+
+def encode_frame(rules, df):
+    """
+    Vectorized RuleSet.encode() over a DataFrame of text cells: each feature
+    reads the first of its input keys present as a column and parses it with
+    the same parser as /predict. Returns (X, invalid).
+    """
+    X = np.empty((len(df), len(rules.features)), dtype=np.float64)
+    invalid = np.zeros(len(df), dtype=bool)
+    for j, (keys, _, parser) in enumerate(rules.inputs):
+        column = next(key for key in keys if key in df.columns)
+        values, bad = _parse_column(df[column], parser)
+        X[:, j] = values
+        if bad is not None:
+            invalid |= bad
+    return X, invalid
+
+
+def label_frame(disease, df):
+    """
+    Set health_status (and the disease's target column) on df in place:
+    1 = Risky, 0 = Normal. Cells are parsed as the app parses form values,
+    so a blank or unparsable cell makes the row Risky, as it does at /predict.
+    Returns the number of Risky rows.
+    """
+    rules = RULE_ENGINE[disease]
+    missing = [keys[0] for keys, _, _ in rules.inputs if not any(key in df.columns for key in keys)]
+    if missing:
+        raise ValueError(f"{disease}: CSV is missing columns {missing}")
+
+    risky, _ = rules.evaluate(*encode_frame(rules, df))
+
+    labels = risky.astype(np.int8)
+    df[STATUS_COLUMN] = labels
+    target = LABEL_COLUMNS.get(disease)
+    if target:
+        df[target] = labels
+    return int(labels.sum())
+
+
+def relabel_csv(disease, source, destination=None, chunk_rows=CHUNK_ROWS):
+    """
+    Stream source through label_frame chunk by chunk and atomically replace
+    destination (default: source itself).
+    Returns {'rows': ..., 'risky': ..., 'seconds': ...}.
+    """
+    if disease not in RULE_ENGINE:
+        raise ValueError(f"No range rules for {disease}")
+    destination = destination or source
+    directory = os.path.dirname(os.path.abspath(destination))
+    tmp_path = os.path.join(directory, f".{os.path.basename(destination)}.tmp")
+
+    started = time.perf_counter()
+    rows = risky = 0
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as out:
+            # Cells are read as text and written back untouched; only the
+            # rule columns are parsed, and only the label columns change
+            chunks = pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+            for i, chunk in enumerate(chunks):
+                risky += label_frame(disease, chunk)
+                rows += len(chunk)
+                chunk.to_csv(out, header=(i == 0), index=False)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, destination)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return {'rows': rows, 'risky': risky, 'seconds': time.perf_counter() - started}
+
+
+def main(argv=None):
+    diseases = sorted(LABEL_COLUMNS)
+    parser = argparse.ArgumentParser(description="Relabel CSVs from the clinical range rules")
+    parser.add_argument("diseases", nargs="*",
+                        help="diseases to relabel (default: all with range rules)")
+    parser.add_argument("--input", help="CSV to relabel (one disease only; default data/<disease>_simple.csv)")
+    parser.add_argument("--output", help="where to write it (default: overwrite the input)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS,
+                        help="rows held in memory at a time")
+    args = parser.parse_args(argv)
+
+    unknown = [d for d in args.diseases if d not in LABEL_COLUMNS]
+    if unknown:
+        parser.error(f"no range rules for: {', '.join(unknown)}")
+    selected = args.diseases or diseases
+    if (args.input or args.output) and len(selected) != 1:
+        parser.error("--input/--output need exactly one disease")
+
+    for disease in selected:
+        source = args.input or default_path(disease)
+        stats = relabel_csv(disease, source, args.output, args.chunk_rows)
+        print(f"✓ {disease}: {stats['rows']} rows "
+              f"(Normal {stats['rows'] - stats['risky']}, Risky {stats['risky']}) "
+              f"in {stats['seconds']:.2f}s -> {args.output or source}")
+
+
+if __name__ == "__main__":
+    main()
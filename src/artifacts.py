@@ -0,0 +1,277 @@
+# src/artifacts.py
+#
+# Versioned model artifacts. Each disease gets one directory:
+#
+#   models/<disease>/CURRENT            -> "v0003" (switched atomically)
+#   models/<disease>/v0003/manifest.json   format, version, features, threshold,
+#                                          metrics, per-file and overall sha256
+#   models/<disease>/v0003/*.npy           flat forest + fused preprocessing arrays
+#   models/<disease>/v0003/checkpoint.pkl  sklearn objects, for retraining only
+#   models/<disease>/v0003/report.json     cross-validated metrics + inference benchmark
+#
+# The .npy arrays are opened with np.load(mmap_mode='r'), so every worker
+# process maps the same page-cache copy instead of unpickling its own forest.
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+import numpy as np
+
+from src.features import MODEL_FEATURES
+from src.flat_forest import flatten_forest
+from src.preprocess import fuse_preprocessing
+
+# Models folder
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+
+FORMAT = "disease-model/1"
+POINTER = "CURRENT"
+MANIFEST = "manifest.json"
+CHECKPOINT = "checkpoint.pkl"
+KEEP_VERSIONS = 3
+
+# Scalars kept in the manifest rather than as 0-d arrays
+_SCALARS = ("max_depth", "n_features")
+
+
+def artifact_root(disease, model_dir=MODEL_DIR):
+    return os.path.join(model_dir, disease)
+
+
+def pointer_path(disease, model_dir=MODEL_DIR):
+    return os.path.join(artifact_root(disease, model_dir), POINTER)
+
+
+def current_path(disease, model_dir=MODEL_DIR):
+    """Directory of the live version, or None if the disease has no artifact"""
+    try:
+        with open(pointer_path(disease, model_dir), "r") as f:
+            version_dir = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(artifact_root(disease, model_dir), version_dir)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _combined_hash(files):
+    digest = hashlib.sha256()
+    for name in sorted(files):
+        digest.update(f"{name}:{files[name]['sha256']}\n".encode("ascii"))
+    return digest.hexdigest()
+
+
+# ---------------------------
+# Writing
+# ---------------------------
+def arrays_from_sklearn(model, imputer, scaler):
+    """Serving arrays (forest.* and preprocess.*) plus manifest scalars"""
+    forest = flatten_forest(model)
+    scalars = {name: int(forest.pop(name)) for name in _SCALARS}
+    arrays = {f"forest.{name}": value for name, value in forest.items()}
+    for name, value in fuse_preprocessing(imputer, scaler).to_arrays().items():
+        arrays[f"preprocess.{name}"] = value
+    return arrays, scalars
+
+
+def save_artifact(disease, model, imputer, scaler, fields=None, model_dir=MODEL_DIR,
+                  keep=KEEP_VERSIONS, reports=None, publish=True):
+    """
+    Write a new version of the disease artifact and switch CURRENT to it.
+    fields: manifest entries (features, threshold, metrics, watermark, ...).
+    reports: {filename: dict} written as JSON next to the arrays and hashed
+    like them. With publish=False the version is written but CURRENT is
+    left alone (e.g. it failed a deployment gate).
+    Returns the manifest.
+    """
+    root = artifact_root(disease, model_dir)
+    os.makedirs(root, exist_ok=True)
+    versions = list_versions(disease, model_dir)
+    version = (versions[-1] + 1) if versions else 1
+    name = f"v{version:04d}"
+    tmp_dir = os.path.join(root, f".{name}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    arrays, scalars = arrays_from_sklearn(model, imputer, scaler)
+    files = {}
+    for key, value in arrays.items():
+        filename = f"{key.replace('.', '_')}.npy"
+        path = os.path.join(tmp_dir, filename)
+        np.save(path, np.ascontiguousarray(value), allow_pickle=False)
+        files[key] = {"file": filename, "dtype": str(value.dtype), "shape": list(value.shape),
+                      "sha256": _sha256(path)}
+
+    checkpoint_path = os.path.join(tmp_dir, CHECKPOINT)
+    with open(checkpoint_path, "wb") as f:
+        pickle.dump({"model": model, "imputer": imputer, "scaler": scaler}, f)
+    files["checkpoint"] = {"file": CHECKPOINT, "sha256": _sha256(checkpoint_path)}
+
+    for filename, report in (reports or {}).items():
+        report_path = os.path.join(tmp_dir, filename)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+        files[os.path.splitext(filename)[0]] = {"file": filename, "sha256": _sha256(report_path)}
+
+    manifest = {
+        "format": FORMAT,
+        "disease": disease,
+        "version": version,
+        **scalars,
+        "classes": [int(c) for c in model.classes_],
+        "n_estimators": len(model.estimators_),
+        **(fields or {}),
+        "files": files,
+        "sha256": _combined_hash(files),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    os.replace(tmp_dir, os.path.join(root, name))
+    if publish:
+        tmp_pointer = pointer_path(disease, model_dir) + ".tmp"
+        with open(tmp_pointer, "w") as f:
+            f.write(name + "\n")
+        os.replace(tmp_pointer, pointer_path(disease, model_dir))
+
+    # Old versions stay mapped by running workers until they reload; only
+    # the oldest beyond `keep` are removed, never the live one
+    live = current_path(disease, model_dir)
+    for old in versions[:max(0, len(versions) + 1 - keep)]:
+        old_dir = os.path.join(root, f"v{old:04d}")
+        if old_dir != live:
+            shutil.rmtree(old_dir, ignore_errors=True)
+    return manifest
+
+
+def list_versions(disease, model_dir=MODEL_DIR):
+    root = artifact_root(disease, model_dir)
+    if not os.path.isdir(root):
+        return []
+    return sorted(int(name[1:]) for name in os.listdir(root)
+                  if name.startswith("v") and name[1:].isdigit())
+
+
+# ---------------------------
+# Reading
+# ---------------------------
+def read_manifest(version_dir):
+    with open(os.path.join(version_dir, MANIFEST), "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"Unsupported artifact format in {version_dir}: {manifest.get('format')}")
+    return manifest
+
+
+def verify_artifact(version_dir, manifest=None):
+    """Raise ValueError if any file does not match the manifest hashes"""
+    manifest = manifest or read_manifest(version_dir)
+    files = manifest["files"]
+    for key, entry in files.items():
+        if _sha256(os.path.join(version_dir, entry["file"])) != entry["sha256"]:
+            raise ValueError(f"Checksum mismatch for {key} in {version_dir}")
+    if _combined_hash(files) != manifest["sha256"]:
+        raise ValueError(f"Manifest hash mismatch in {version_dir}")
+
+
+def load_artifact(version_dir, mmap=True, verify=False):
+    """
+    Return (manifest, arrays). arrays maps 'forest.*' / 'preprocess.*'
+    to read-only memory-mapped arrays (or in-memory ones with mmap=False).
+    """
+    manifest = read_manifest(version_dir)
+    if verify:
+        verify_artifact(version_dir, manifest)
+    arrays = {}
+    for key, entry in manifest["files"].items():
+        if not entry["file"].endswith(".npy"):
+            continue
+        arrays[key] = np.load(os.path.join(version_dir, entry["file"]),
+                              mmap_mode="r" if mmap else None, allow_pickle=False)
+    for name in _SCALARS:
+        arrays[f"forest.{name}"] = np.array(manifest[name])
+    return manifest, arrays
+
+
+def load_checkpoint(version_dir):
+    """sklearn {'model', 'imputer', 'scaler'} saved with a version (training only)"""
+    with open(os.path.join(version_dir, CHECKPOINT), "rb") as f:
+        return pickle.load(f)
+
+
+def split_arrays(arrays, prefix):
+    prefix = prefix + "."
+    return {key[len(prefix):]: value for key, value in arrays.items() if key.startswith(prefix)}
+
+
+# ---------------------------
+# Migration from loose pickles
+# ---------------------------
+def export_all(model_dir=MODEL_DIR, remove_legacy=False):
+    """
+    Build an artifact for every disease with <disease>_model/_imputer/_scaler.pkl,
+    carrying over <disease>_meta.json fields. With remove_legacy the loose
+    files are deleted afterwards.
+    """
+    legacy_suffixes = ("_model.pkl", "_imputer.pkl", "_scaler.pkl",
+                       "_forest.npz", "_preprocess.npz", "_meta.json")
+    for name in sorted(os.listdir(model_dir)):
+        if not name.endswith("_model.pkl"):
+            continue
+        disease = name[:-len("_model.pkl")]
+        paths = {part: os.path.join(model_dir, f"{disease}_{part}.pkl")
+                 for part in ("model", "imputer", "scaler")}
+        if not all(os.path.exists(p) for p in paths.values()):
+            continue
+        loaded = {}
+        for part, path in paths.items():
+            with open(path, "rb") as f:
+                loaded[part] = pickle.load(f)
+
+        fields = {"features": list(MODEL_FEATURES.get(disease, []))}
+        meta_path = os.path.join(model_dir, f"{disease}_meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            for key in ("classes", "n_estimators", "version", "disease"):
+                meta.pop(key, None)
+            fields.update(meta)
+
+        manifest = save_artifact(disease, loaded["model"], loaded["imputer"], loaded["scaler"],
+                                 fields, model_dir)
+        print(f"Exported {disease} artifact v{manifest['version']:04d}.")
+
+        if remove_legacy:
+            for suffix in legacy_suffixes:
+                path = os.path.join(model_dir, disease + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--verify" in sys.argv:
+        failed = False
+        for disease in sorted(os.listdir(MODEL_DIR)):
+            path = current_path(disease) if os.path.isdir(artifact_root(disease)) else None
+            if path is None:
+                continue
+            try:
+                verify_artifact(path)
+                print(f"✓ {disease}: {os.path.basename(path)}")
+            except (OSError, ValueError) as e:
+                failed = True
+                print(f"✗ {disease}: {e}")
+        sys.exit(1 if failed else 0)
+
+    export_all(remove_legacy="--remove-legacy" in sys.argv)
@@ -0,0 +1,156 @@
+# src/auth_cache.py
+#
+# In-memory front for /login: caches user records for a short TTL (and
+# unknown usernames for a much shorter one) and throttles repeated failures per username and per client IP with
+# exponential backoff, so brute-force attempts are refused before any
+# database lookup or PBKDF2 work.
+
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, ttl, max_entries=10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+
+    def get(self, key, default=None, now=None):
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expires_at = item
+        now = time.monotonic() if now is None else now
+        if now >= expires_at:
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl=None, now=None):
+        now = time.monotonic() if now is None else now
+        self._data[key] = (value, now + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key):
+        self._data.pop(key, None)
+
+    def discard_where(self, predicate):
+        """Drop every entry whose key matches predicate; returns how many"""
+        stale = [key for key in self._data if predicate(key)]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class LoginGuard:
+    """
+    user_ttl:         how long a looked-up user record is reused
+    miss_ttl:         how long an unknown username is reused; kept short
+                      because forget_user only clears this process, so a
+                      signup on another worker shows up after miss_ttl
+    free_failures:    failures allowed per username before backoff starts
+    ip_free_failures: same for a client IP (shared by everyone behind a NAT)
+    base_delay:       first lockout in seconds; doubles with each further failure
+    max_delay:        lockout cap
+    failure_ttl:      failures are forgotten after this long without a new one
+    """
+
+    def __init__(self, user_ttl=30.0, miss_ttl=1.0, free_failures=5, ip_free_failures=20, base_delay=1.0,
+                 max_delay=900.0, failure_ttl=900.0, max_entries=10000):
+        self.free_failures = {"user": free_failures, "ip": ip_free_failures}
+        self.base_delay = base_delay
+        self.miss_ttl = miss_ttl
+        self.max_delay = max_delay
+        self._users = TTLCache(user_ttl, max_entries)
+        self._failures = TTLCache(failure_ttl, max_entries)
+        self._lock = threading.Lock()
+        self.user_hits = 0
+        self.negative_hits = 0
+        self.throttled = 0
+
+    # ---------------------------
+    # User records
+    # ---------------------------
+    def get_user(self, username, load):
+        """
+        Cached user record for username. load(username) is called on a
+        miss and must return a dict or None; None is cached for miss_ttl.
+        Returns the record or None.
+        """
+        with self._lock:
+            user = self._users.get(username)
+            if user is MISSING:
+                self.negative_hits += 1
+                return None
+            if user is not None:
+                self.user_hits += 1
+                return user
+
+        user = load(username)
+        with self._lock:
+            if user is None:
+                if self.miss_ttl > 0:
+                    self._users.set(username, MISSING, ttl=self.miss_ttl)
+            else:
+                self._users.set(username, user)
+        return user
+
+    def forget_user(self, username):
+        """Drop the cached record (after signup or a password change)"""
+        with self._lock:
+            self._users.pop(username)
+
+    # ---------------------------
+    # Failure throttling
+    # ---------------------------
+    def retry_after(self, username, ip):
+        """Seconds the caller must wait before another attempt (0 = allowed)"""
+        now = time.monotonic()
+        with self._lock:
+            wait = 0.0
+            for key in (("user", username), ("ip", ip)):
+                state = self._failures.get(key, now=now)
+                if state is not None:
+                    wait = max(wait, state[1] - now)
+            if wait > 0:
+                self.throttled += 1
+                return wait
+            return 0.0
+
+    def record_failure(self, username, ip):
+        now = time.monotonic()
+        with self._lock:
+            for key in (("user", username), ("ip", ip)):
+                count, _ = self._failures.get(key, (0, 0.0), now=now)
+                count += 1
+                locked_until = now
+                free = self.free_failures[key[0]]
+                if count > free:
+                    delay = self.base_delay * 2 ** min(count - free - 1, 32)
+                    locked_until = now + min(delay, self.max_delay)
+                self._failures.set(key, (count, locked_until), now=now)
+
+    def record_success(self, username, ip):
+        with self._lock:
+            self._failures.pop(("user", username))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_users": len(self._users),
+                "tracked_failures": len(self._failures),
+                "user_hits": self.user_hits,
+                "negative_hits": self.negative_hits,
+                "throttled": self.throttled,
+            }
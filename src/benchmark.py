@@ -0,0 +1,71 @@
+# src/benchmark.py
+#
+# Inference micro-benchmark over the serving path (fused preprocessing +
+# flat forest + threshold), so the numbers match what /predict runs.
+
+import time
+
+import numpy as np
+
+from src.artifacts import arrays_from_sklearn, split_arrays
+from src.flat_forest import FlatForest
+from src.inference import predict_with_threshold
+from src.preprocess import FusedPreprocessor
+
+
+def serving_components(model, imputer, scaler, meta):
+    """The components the app would build from this model's artifact"""
+    arrays, scalars = arrays_from_sklearn(model, imputer, scaler)
+    preprocess = split_arrays(arrays, "preprocess")
+    return {
+        "predictor": FlatForest({**split_arrays(arrays, "forest"), **scalars}),
+        "preprocess": FusedPreprocessor(
+            preprocess["fill"], preprocess["mean"], preprocess["scale"], preprocess["keep"]
+        ),
+        "meta": meta,
+    }
+
+
+def _predict(components, X):
+    return predict_with_threshold(components, components["preprocess"].transform(X))
+
+
+def benchmark_components(components, X, single_iters=500, batch_rows=10000, warmup=20):
+    """
+    components: {'predictor', 'preprocess', 'meta'} as served by the app
+    X: sample of raw feature rows (NaN = missing)
+    Returns single-row latency percentiles (ms) and batch throughput.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    rng = np.random.default_rng(0)
+    rows = X[rng.integers(0, len(X), size=single_iters + warmup)]
+
+    for i in range(warmup):
+        _predict(components, rows[i:i + 1])
+
+    latencies = np.empty(single_iters)
+    for i in range(single_iters):
+        row = rows[warmup + i:warmup + i + 1]
+        started = time.perf_counter()
+        _predict(components, row)
+        latencies[i] = time.perf_counter() - started
+    latencies *= 1000.0
+
+    batch = X[rng.integers(0, len(X), size=batch_rows)]
+    started = time.perf_counter()
+    _predict(components, batch)
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "single_row_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 4),
+            "p90": round(float(np.percentile(latencies, 90)), 4),
+            "p99": round(float(np.percentile(latencies, 99)), 4),
+            "iterations": single_iters,
+        },
+        "batch": {
+            "rows": batch_rows,
+            "seconds": round(batch_seconds, 4),
+            "rows_per_sec": round(batch_rows / batch_seconds, 1) if batch_seconds > 0 else None,
+        },
+    }
@@ -0,0 +1,66 @@
+# src/db.py
+
+import queue
+import sqlite3
+import threading
+
+# Applied once when a connection is opened, not on every checkout
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=10000",
+    "PRAGMA cache_size=-16000",      # ~16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped reads
+)
+
+
+def connect(database, timeout=10.0):
+    """Open a tuned SQLite connection (rows accessible by column name)"""
+    conn = sqlite3.connect(database, timeout=timeout, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+class ConnectionPool:
+    """
+    Small thread-safe pool of SQLite connections.
+    A connection is used by one thread at a time; idle connections beyond
+    `size` are closed on release.
+    """
+
+    def __init__(self, database, size=8, timeout=10.0):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self.opened = 0
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                self.opened += 1
+            return connect(self.database, self.timeout)
+
+    def release(self, conn):
+        try:
+            # Never hand the next request a half-finished transaction
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        return {"size": self.size, "idle": self._idle.qsize(), "opened": self.opened}
@@ -0,0 +1,126 @@
+# src/doctors.py
+
+import itertools
+import json
+import os
+import threading
+import time
+
+# Doctor directory data file
+DOCTORS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "doctors.json")
+
+STRATEGIES = ("round_robin", "least_loaded")
+
+
+class DoctorIndex:
+    """Immutable snapshot of the directory, indexed by id and department"""
+
+    def __init__(self, data, mtime=0):
+        self.mtime = mtime
+        self.doctors = list(data["doctors"])
+        self.disease_departments = dict(data.get("disease_departments", {}))
+        self.fallback_department = data.get("fallback_department")
+        self.by_id = {doctor["id"]: doctor for doctor in self.doctors}
+        self.by_department = {}
+        for doctor in self.doctors:
+            department = doctor.get("department", doctor["specialty"])
+            self.by_department.setdefault(department, []).append(doctor)
+        # One rotation counter per department for round-robin assignment
+        self._turns = {department: itertools.count() for department in self.by_department}
+
+    def department_for(self, disease):
+        department = self.disease_departments.get(disease, self.fallback_department)
+        if department not in self.by_department:
+            department = self.fallback_department
+        return department
+
+    def candidates(self, disease):
+        return self.by_department.get(self.department_for(disease), [])
+
+    def next_turn(self, department):
+        return next(self._turns[department])
+
+
+class DoctorDirectory:
+    """
+    Doctor directory loaded from data/doctors.json.
+
+    - Loaded once and indexed by department; recommend() picks one of the
+      department's doctors by round robin or by fewest appointments
+    - The file is re-checked at most every `check_interval` seconds and the
+      index is rebuilt and swapped in when it changes; a bad edit keeps the
+      previous index
+    """
+
+    def __init__(self, path=DOCTORS_PATH, strategy="round_robin", check_interval=1.0):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown doctor assignment strategy: {strategy}")
+        self.path = path
+        self.strategy = strategy
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._index = None
+        self._checked_at = 0.0
+        self.reloads = 0
+
+    def _load(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, "r", encoding="utf-8") as f:
+            return DoctorIndex(json.load(f), mtime)
+
+    def index(self):
+        """Current DoctorIndex, reloaded if the data file changed"""
+        index = self._index
+        now = time.monotonic()
+        if index is not None and now - self._checked_at < self.check_interval:
+            return index
+
+        with self._lock:
+            if self._index is not None and now - self._checked_at < self.check_interval:
+                return self._index
+            try:
+                if self._index is None or os.stat(self.path).st_mtime_ns != self._index.mtime:
+                    self._index = self._load()
+                    self.reloads += 1
+            except (OSError, ValueError, KeyError) as e:
+                if self._index is None:
+                    raise
+                print(f"[Error] Reloading doctor directory failed, keeping previous: {e}")
+            self._checked_at = now
+            return self._index
+
+    def all(self):
+        return self.index().doctors
+
+    def get(self, doctor_id):
+        return self.index().by_id.get(doctor_id)
+
+    def recommend(self, disease, appointment_counts=None):
+        """
+        Pick a doctor for disease. appointment_counts(names) -> {name: count}
+        is only called for 'least_loaded' when there is more than one
+        candidate; ties fall back to round-robin order.
+        """
+        index = self.index()
+        department = index.department_for(disease)
+        candidates = index.by_department.get(department, [])
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+
+        turn = index.next_turn(department)
+        rotated = candidates[turn % len(candidates):] + candidates[:turn % len(candidates)]
+        if self.strategy == "least_loaded" and appointment_counts is not None:
+            counts = appointment_counts([doctor["name"] for doctor in candidates])
+            return min(rotated, key=lambda doctor: counts.get(doctor["name"], 0))
+        return rotated[0]
+
+    def stats(self):
+        index = self._index
+        return {
+            "strategy": self.strategy,
+            "doctors": len(index.doctors) if index else 0,
+            "departments": len(index.by_department) if index else 0,
+            "reloads": self.reloads,
+        }
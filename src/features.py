@@ -0,0 +1,98 @@
+# src/features.py
+#
+# Feature lists and the request-path encoder. Kept free of pandas/sklearn
+# so the web app can import it without pulling in the training stack.
+
+import numpy as np
+
+# --- Define Features for all 7 Diseases ---
+MODEL_FEATURES = {
+
+    'diabetes': [
+        'Pregnancies',
+        'Glucose',
+        'BloodPressure',
+        'BMI',
+        'Age'
+    ],
+
+    'kidney': [
+        'sg',
+        'al',
+        'rbc',
+        'pc',
+        'hemo',
+        'wc',
+        'rc',
+        'bp'
+    ],
+
+    'liver': [
+        'Age',
+        'Gender',
+        'Total_Bilirubin',
+        'Direct_Bilirubin',
+        'Alkaline_Phosphotase',
+        'Alamine_Aminotransferase',
+        'Aspartate_Aminotransferase'
+    ],
+
+    'malaria': [
+        'Temperature',
+        'Headache',
+        'Vomiting',
+        'JointPain',
+        'RBC'
+    ],
+
+    'thyroid': [
+        'Age',
+        'Sex',
+        'TSH',
+        'T3',
+        'T4',
+        'Thyroxine'
+    ],
+
+    'pneumonia': [
+        'Age',
+        'CoughSeverity',
+        'WBC',
+        'OxygenSaturation',
+        'Fever'
+    ]
+}
+
+
+def parse_feature(value):
+    """float(value), or NaN when the value is missing, blank or not numeric"""
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def encode_features(disease, inputs, out=None):
+    """
+    Turn a request.form-style dict into a (1, n_features) float64 vector in
+    MODEL_FEATURES order. Missing or unparsable values become NaN so the
+    fitted imputer fills them.
+    """
+    features = MODEL_FEATURES[disease]
+    if out is None:
+        out = np.empty((1, len(features)), dtype=np.float64)
+    row = out.reshape(-1)
+    for j, f in enumerate(features):
+        row[j] = parse_feature(inputs.get(f))
+    return out
+
+
+def encode_rows(disease, rows):
+    """Encode many input dicts into one (n_rows, n_features) float64 matrix"""
+    features = MODEL_FEATURES[disease]
+    X = np.empty((len(rows), len(features)), dtype=np.float64)
+    for i, inputs in enumerate(rows):
+        encode_features(disease, inputs, out=X[i])
+    return X
@@ -0,0 +1,117 @@
+# src/flat_forest.py
+
+import numpy as np
+
+TREE_LEAF = -1
+
+
+# ---------------------------
+# Export (needs sklearn only at training time)
+# ---------------------------
+def flatten_forest(model):
+    """
+    Flatten a fitted RandomForestClassifier into contiguous NumPy arrays.
+    All trees are concatenated; child indices are global node offsets.
+    """
+    features, thresholds, lefts, rights, missing_left, values, roots = [], [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+
+    for estimator in model.estimators_:
+        state = estimator.tree_.__getstate__()
+        nodes = state["nodes"]
+        n_nodes = len(nodes)
+
+        left = nodes["left_child"].astype(np.int64)
+        right = nodes["right_child"].astype(np.int64)
+        is_leaf = left == TREE_LEAF
+
+        lefts.append(np.where(is_leaf, TREE_LEAF, left + offset))
+        rights.append(np.where(is_leaf, TREE_LEAF, right + offset))
+        features.append(np.where(is_leaf, 0, nodes["feature"]).astype(np.int64))
+        thresholds.append(nodes["threshold"].astype(np.float64))
+        if "missing_go_to_left" in nodes.dtype.names:
+            missing_left.append(nodes["missing_go_to_left"].astype(bool))
+        else:
+            missing_left.append(np.zeros(n_nodes, dtype=bool))
+
+        # sklearn >= 1.4 stores leaf fractions and uses them as-is; older
+        # versions store counts and normalise in predict_proba
+        proba = state["values"][:, 0, :model.n_classes_].astype(np.float64)
+        normalizer = proba.sum(axis=1)[:, np.newaxis]
+        if not np.allclose(normalizer[normalizer > 0], 1.0):
+            normalizer[normalizer == 0.0] = 1.0
+            proba = proba / normalizer
+        values.append(proba)
+
+        roots.append(offset)
+        offset += n_nodes
+        max_depth = max(max_depth, int(state["max_depth"]))
+
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "missing_left": np.concatenate(missing_left),
+        "value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int64),
+        "classes": np.asarray(model.classes_),
+        "max_depth": np.array(max_depth, dtype=np.int64),
+        "n_features": np.array(model.n_features_in_, dtype=np.int64),
+    }
+
+
+# ---------------------------
+# Lightweight predictor (no sklearn in the hot path)
+# ---------------------------
+class FlatForest:
+    """
+    Array-based forest evaluator with the same predict / predict_proba
+    interface as the pickled RandomForestClassifier.
+    """
+
+    def __init__(self, arrays):
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.missing_left = arrays["missing_left"].astype(bool)
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.classes_ = arrays["classes"]
+        self.max_depth = int(arrays["max_depth"])
+        self.n_features_in_ = int(arrays["n_features"])
+        self.n_estimators = len(self.roots)
+
+    def apply(self, X):
+        """Return leaf node index per (row, tree)"""
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.n_estimators)).copy()
+
+        for _ in range(self.max_depth):
+            left = self.left[nodes]
+            internal = left != TREE_LEAF
+            if not internal.any():
+                break
+            x = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(x), self.missing_left[nodes], x <= self.threshold[nodes])
+            nodes = np.where(internal, np.where(go_left, left, self.right[nodes]), nodes)
+
+        return nodes
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        # Accumulate trees in order (cumsum is sequential), then average,
+        # so results match RandomForestClassifier.predict_proba exactly
+        proba = np.cumsum(self.value[leaves], axis=1)[:, -1, :]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
@@ -0,0 +1,87 @@
+# src/history.py
+#
+# Keyset pagination over a user's prediction history. Pages are ordered by
+# (timestamp, id) descending and continue from an opaque cursor, so every
+# page is a bounded index range scan on idx_predictions_user_time no matter
+# how deep into the history it is.
+
+import base64
+import binascii
+
+from src.prediction_inputs import parse_stored_inputs
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 200
+EXPORT_CHUNK_SIZE = 500
+
+COLUMNS = ("id", "disease", "timestamp", "input_data", "result")
+
+_FIRST_PAGE_SQL = (
+    f"SELECT {', '.join(COLUMNS)} FROM predictions WHERE user_id=? "
+    "ORDER BY timestamp DESC, id DESC LIMIT ?"
+)
+_NEXT_PAGE_SQL = (
+    f"SELECT {', '.join(COLUMNS)} FROM predictions WHERE user_id=? AND (timestamp, id) < (?, ?) "
+    "ORDER BY timestamp DESC, id DESC LIMIT ?"
+)
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just past `row`"""
+    raw = f"{row['timestamp']}|{row['id']}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return (timestamp, id); raises ValueError for a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        timestamp, row_id = raw.rsplit("|", 1)
+        return timestamp, int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a user-supplied page size to [1, MAX_PAGE_SIZE]"""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def fetch_page(conn, user_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of history, newest first.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    # Fetch one extra row to know whether another page exists
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        rows = conn.execute(_NEXT_PAGE_SQL, (user_id, timestamp, row_id, limit + 1)).fetchall()
+    else:
+        rows = conn.execute(_FIRST_PAGE_SQL, (user_id, limit + 1)).fetchall()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def iter_history(conn, user_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield every row of a user's history, holding at most one chunk in memory"""
+    cursor = None
+    while True:
+        rows, cursor = fetch_page(conn, user_id, cursor, chunk_size)
+        yield from rows
+        if cursor is None:
+            return
+
+
+def row_to_dict(row):
+    """JSON-ready row; input_data is decoded back into an object"""
+    item = {column: row[column] for column in COLUMNS}
+    inputs = parse_stored_inputs(item["input_data"])
+    if inputs is not None:
+        item["input_data"] = inputs
+    return item
@@ -0,0 +1,270 @@
+# src/history_writer.py
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from src.db import connect
+from src.prediction_inputs import canonical_json, insert_features
+
+INSERT_SQL = (
+    "INSERT INTO predictions (user_id, disease, input_data, result, timestamp) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+_STOP = object()
+
+
+def utc_timestamp():
+    """Same text format as SQLite's CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class HistoryWriter:
+    """
+    Write-behind queue for prediction history.
+
+    Requests enqueue their rows and return immediately; one background
+    thread groups pending rows into a single transaction every
+    `flush_interval` seconds or `max_batch` rows, whichever comes first.
+    stop() (also run at interpreter exit) drains and commits everything
+    that was queued. When the queue is full, or after stop(), rows are
+    written synchronously so nothing is dropped.
+
+    A batch that still fails after a few attempts is appended to
+    `spill_path` (JSON lines, one batch per line, default
+    <database>.spill.jsonl) and replayed when the writer starts and after
+    the next successful write. Rows are only lost, and logged as such, if
+    the spill file cannot be written either.
+    """
+
+    def __init__(self, database, max_queue=10000, flush_interval=0.05, max_batch=500, spill_path=None):
+        self.database = database
+        self.spill_path = spill_path or f"{database}.spill.jsonl"
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._stopping = False
+        self.rows_written = 0
+        self.batches_written = 0
+        self.sync_writes = 0
+        self.errors = 0
+        self.spilled_rows = 0
+        self.replayed_rows = 0
+        self.dropped_rows = 0
+
+    # ---------------------------
+    # Producer side
+    # ---------------------------
+    def submit(self, rows):
+        """
+        rows: list of (user_id, disease, inputs, result) tuples that must
+        be committed together. inputs is the submitted dict; it is stored
+        as canonical JSON plus one prediction_features row per feature.
+        """
+        stamp = utc_timestamp()
+        rows = [tuple(row) + (stamp,) for row in rows]
+        if not rows:
+            return
+
+        if not self._stopping:
+            self._ensure_started()
+            try:
+                self._queue.put(rows, timeout=self.flush_interval)
+                return
+            except queue.Full:
+                pass
+
+        # Back-pressure fallback: commit on the caller's thread
+        with self._lock:
+            self.sync_writes += 1
+        conn = connect(self.database)
+        try:
+            self._write(conn, rows)
+        finally:
+            conn.close()
+
+    def depth(self):
+        """Number of queued (not yet committed) submissions"""
+        return self._queue.qsize()
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stop(self, timeout=10.0):
+        """Drain the queue, commit and stop the worker thread"""
+        with self._lock:
+            if self._stopping:
+                return
+            self._stopping = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def stats(self):
+        return {
+            "queue_depth": self.depth(),
+            "rows_written": self.rows_written,
+            "batches_written": self.batches_written,
+            "sync_writes": self.sync_writes,
+            "errors": self.errors,
+            "spilled_rows": self.spilled_rows,
+            "replayed_rows": self.replayed_rows,
+            "dropped_rows": self.dropped_rows,
+            "running": self._thread is not None and self._thread.is_alive(),
+        }
+
+    # ---------------------------
+    # Worker side
+    # ---------------------------
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        conn = connect(self.database)
+        try:
+            # Batches spilled by an earlier run
+            self._replay(conn)
+            stop = False
+            while not stop:
+                item = self._queue.get()
+                if item is _STOP:
+                    self._queue.task_done()
+                    break
+
+                batch = [item]
+                n_rows = len(item)
+                deadline = time.monotonic() + self.flush_interval
+                while n_rows < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        self._queue.task_done()
+                        stop = True
+                        break
+                    batch.append(item)
+                    n_rows += len(item)
+
+                self._write(conn, [row for rows in batch for row in rows])
+                for _ in batch:
+                    self._queue.task_done()
+
+            # Submissions that raced with stop() landed behind the sentinel
+            leftover = []
+            while True:
+                try:
+                    leftover.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            pending = [row for rows in leftover if rows is not _STOP for row in rows]
+            if pending:
+                self._write(conn, pending)
+            for _ in leftover:
+                self._queue.task_done()
+        finally:
+            conn.close()
+
+    def _write(self, conn, rows, attempts=3):
+        if self._insert(conn, rows, attempts):
+            self._replay(conn)
+        else:
+            self._spill([rows])
+
+    def _insert(self, conn, rows, attempts):
+        """Commit rows in one transaction; returns False if every attempt failed"""
+        for attempt in range(attempts):
+            try:
+                with conn:
+                    for user_id, disease, inputs, result, stamp in rows:
+                        cursor = conn.execute(
+                            INSERT_SQL, (user_id, disease, canonical_json(inputs), result, stamp)
+                        )
+                        insert_features(conn, cursor.lastrowid, disease, inputs)
+                with self._lock:
+                    self.rows_written += len(rows)
+                    self.batches_written += 1
+                return True
+            except Exception as e:
+                print(f"[Error] Writing prediction history failed (attempt {attempt + 1}): {e}")
+                if attempt + 1 < attempts:
+                    time.sleep(0.05 * (attempt + 1))
+        with self._lock:
+            self.errors += 1
+        return False
+
+    # ---------------------------
+    # Spill file
+    # ---------------------------
+    def _spill(self, batches):
+        """Append batches to the spill file; logs and counts the rows as lost if that fails"""
+        n_rows = sum(len(rows) for rows in batches)
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for rows in batches:
+                    f.write(json.dumps([list(row) for row in rows], default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except (OSError, TypeError, ValueError) as e:
+            with self._lock:
+                self.dropped_rows += n_rows
+            print(f"[Error] Prediction history lost: {n_rows} rows could not be written or spilled: {e}")
+            return
+        with self._lock:
+            self.spilled_rows += n_rows
+        print(f"[Error] Prediction history write failed; {n_rows} rows kept in {self.spill_path} for replay")
+
+    def _replay(self, conn):
+        """Commit spilled batches; batches that still fail go back to the spill file"""
+        # Claim the file by renaming it, so another writer (or process)
+        # sharing the database does not replay the same batches
+        claimed = f"{self.spill_path}.{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.replace(self.spill_path, claimed)
+        except FileNotFoundError:
+            return
+
+        batches = []
+        with open(claimed, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    batches.append([tuple(row) for row in json.loads(line)])
+                except ValueError:
+                    # Torn last line of a crashed write
+                    print(f"[Error] Skipping unreadable line in {self.spill_path}: {line[:80]!r}")
+
+        for i, rows in enumerate(batches):
+            if not self._insert(conn, rows, attempts=1):
+                self._spill(batches[i:])
+                break
+            with self._lock:
+                self.replayed_rows += len(rows)
+        os.remove(claimed)
@@ -0,0 +1,30 @@
+# src/inference.py
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.5
+
+
+def decision_threshold(components):
+    """Per-disease threshold from the artifact manifest (default 0.5)"""
+    return float(components.get("meta", {}).get("threshold", DEFAULT_THRESHOLD))
+
+
+def predict_with_threshold(components, X_scaled):
+    """
+    Single predict_proba pass over the forest.
+    Returns (labels, probabilities of the positive class); a row is labelled
+    positive when its probability is above the disease's decision threshold,
+    so an exact 0.5 tie stays negative, as with predict() (argmax).
+    """
+    predictor = components["predictor"]
+    meta = components.get("meta", {})
+    positive = meta.get("positive_class", 1)
+
+    classes = list(predictor.classes_)
+    negative = next(c for c in classes if c != positive)
+
+    proba = predictor.predict_proba(X_scaled)
+    prob = proba[:, classes.index(positive)]
+    labels = np.where(prob > decision_threshold(components), positive, negative)
+    return labels, prob
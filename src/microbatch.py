@@ -0,0 +1,136 @@
+# src/microbatch.py
+#
+# Micro-batching for concurrent single-row ML predictions. One forest pass
+# over 64 rows costs little more than a pass over one row, so under load
+# request threads are grouped: the first thread to arrive opens a batch,
+# waits up to `max_wait` seconds (or until `max_rows` rows have joined),
+# runs one preprocess + predict_proba over all of them and hands each
+# waiting thread its own row back. When nothing else is in flight for the
+# disease the row is predicted inline, so a lone request never waits, and
+# a batch starts early once every in-flight request has joined it.
+
+import threading
+
+import numpy as np
+
+from src.inference import predict_with_threshold
+
+
+def predict_rows(components, X):
+    """(labels, P(Risky)) for raw feature rows: fused preprocessing + one forest pass"""
+    X_scaled = components["preprocess"].transform(X)
+    return predict_with_threshold(components, X_scaled)
+
+
+class _Batch:
+    def __init__(self, components):
+        self.components = components
+        self.rows = []
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.labels = None
+        self.probs = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    max_rows: rows per batched pass (<= 1 disables batching)
+    max_wait: seconds the first row of a batch waits for company
+    Batches never mix models: rows are grouped by disease and the
+    registry's load generation.
+    """
+
+    def __init__(self, max_rows=64, max_wait=0.002):
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._open = {}
+        self._in_flight = {}
+        self.batches = 0
+        self.batched_rows = 0
+        self.bypassed = 0
+        self.largest_batch = 0
+
+    def predict(self, disease, components, x):
+        """
+        x: (1, n_features) raw feature row (as from encode_features)
+        Returns (label, probability) for that row.
+        """
+        key = (disease, components.get("generation"))
+        with self._lock:
+            in_flight = self._in_flight.get(disease, 0)
+            self._in_flight[disease] = in_flight + 1
+            batch = self._open.get(key)
+            if batch is None and (self.max_rows <= 1 or in_flight == 0):
+                # Low traffic: nothing to wait for
+                self.bypassed += 1
+            else:
+                leader = batch is None
+                if leader:
+                    batch = _Batch(components)
+                    self._open[key] = batch
+                index = len(batch.rows)
+                batch.rows.append(x)
+                if len(batch.rows) >= self.max_rows:
+                    # Closed: later arrivals start a new batch
+                    self._open.pop(key, None)
+                    batch.full.set()
+                else:
+                    self._release_if_idle(disease)
+
+        try:
+            if batch is None:
+                labels, probs = predict_rows(components, x)
+                return labels[0], probs[0]
+            if leader:
+                self._run(key, batch)
+            else:
+                batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return batch.labels[index], batch.probs[index]
+        finally:
+            with self._lock:
+                self._in_flight[disease] -= 1
+                self._release_if_idle(disease)
+
+    def _release_if_idle(self, disease):
+        """
+        Start the open batch early when every in-flight request for the
+        disease is already waiting in it: nobody else is about to join.
+        Called with the lock held.
+        """
+        waiting = [batch for (name, _), batch in self._open.items() if name == disease]
+        if waiting and sum(len(batch.rows) for batch in waiting) >= self._in_flight[disease]:
+            for batch in waiting:
+                batch.full.set()
+
+    def _run(self, key, batch):
+        batch.full.wait(self.max_wait)
+        with self._lock:
+            if self._open.get(key) is batch:
+                del self._open[key]
+            rows = list(batch.rows)
+        try:
+            batch.labels, batch.probs = predict_rows(batch.components, np.vstack(rows))
+        except Exception as e:
+            batch.error = e
+        finally:
+            with self._lock:
+                self.batches += 1
+                self.batched_rows += len(rows)
+                self.largest_batch = max(self.largest_batch, len(rows))
+            batch.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_rows": self.max_rows,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "batches": self.batches,
+                "batched_rows": self.batched_rows,
+                "avg_batch": round(self.batched_rows / self.batches, 2) if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "bypassed": self.bypassed,
+            }
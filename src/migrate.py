@@ -0,0 +1,138 @@
+# src/migrate.py
+#
+# Versioned schema migrations. Each migrations/NNNN_name.sql file runs once,
+# in order, inside its own transaction; the applied version is stored in
+# SQLite's PRAGMA user_version. Data migrations are NNNN_name.py files with
+# an upgrade(conn) function, run in the same way.
+
+import importlib.util
+import os
+import re
+import sqlite3
+import sys
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "migrations")
+
+_MIGRATION_FILE = re.compile(r"^(\d+)_([\w-]+)\.(sql|py)$")
+
+# Hot queries and the index each one must use (checked with EXPLAIN QUERY PLAN)
+QUERY_PLAN_CHECKS = {
+    "dashboard history": (
+        "SELECT * FROM predictions WHERE user_id=? ORDER BY timestamp DESC, id DESC LIMIT 26",
+        (1,),
+        "idx_predictions_user_time",
+    ),
+    "dashboard history (next page)": (
+        "SELECT * FROM predictions WHERE user_id=? AND (timestamp, id) < (?, ?) "
+        "ORDER BY timestamp DESC, id DESC LIMIT 26",
+        (1, "2100-01-01 00:00:00", 0),
+        "idx_predictions_user_time",
+    ),
+    "feature cohort": (
+        "SELECT p.id FROM prediction_features f JOIN predictions p ON p.id = f.prediction_id "
+        "WHERE f.disease = ? AND f.feature = ? AND f.value_num >= ? AND f.value_num < ?",
+        ("kidney", "hemo", float("-inf"), 12.0),
+        "idx_prediction_features_value",
+    ),
+}
+
+
+def _load_upgrade(path):
+    spec = importlib.util.spec_from_file_location(f"migration_{os.path.basename(path)[:-3]}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.upgrade
+
+
+def load_migrations(migrations_dir=MIGRATIONS_DIR):
+    """
+    Return [(version, name, step)] sorted by version. step is the SQL text
+    of a .sql migration or the upgrade(conn) function of a .py one.
+    """
+    migrations = []
+    for filename in os.listdir(migrations_dir):
+        match = _MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        path = os.path.join(migrations_dir, filename)
+        if match.group(3) == "py":
+            step = _load_upgrade(path)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                step = f.read()
+        migrations.append((int(match.group(1)), match.group(2), step))
+    migrations.sort(key=lambda m: m[0])
+
+    versions = [m[0] for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"Duplicate migration versions in {migrations_dir}")
+    return migrations
+
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(database, migrations_dir=MIGRATIONS_DIR):
+    """Apply pending migrations; returns the list of versions applied"""
+    conn = sqlite3.connect(database, timeout=30.0, isolation_level=None)
+    applied = []
+    try:
+        for version, name, step in load_migrations(migrations_dir):
+            if version <= current_version(conn):
+                continue
+            try:
+                if callable(step):
+                    conn.execute("BEGIN IMMEDIATE")
+                    step(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                    conn.execute("COMMIT")
+                else:
+                    conn.executescript(
+                        f"BEGIN IMMEDIATE;\n{step}\nPRAGMA user_version = {version};\nCOMMIT;"
+                    )
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            applied.append(version)
+            print(f"✓ Applied migration {version:04d}_{name}")
+    finally:
+        conn.close()
+    return applied
+
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN detail lines for a query"""
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()]
+
+
+def check_query_plans(database):
+    """
+    Confirm the hot queries use their index (no full scan, no temp sort).
+    Returns {check name: (ok, plan lines)}.
+    """
+    conn = sqlite3.connect(database)
+    try:
+        results = {}
+        for label, (sql, params, index) in QUERY_PLAN_CHECKS.items():
+            plan = explain(conn, sql, params)
+            ok = (
+                any(index in line for line in plan)
+                and not any("TEMP B-TREE" in line for line in plan)
+            )
+            results[label] = (ok, plan)
+        return results
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    database = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("DATABASE", "database.db")
+    migrate(database)
+
+    failed = False
+    for label, (ok, plan) in check_query_plans(database).items():
+        print(f"{'✓' if ok else '✗'} {label}: {' | '.join(plan)}")
+        failed = failed or not ok
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,207 @@
+# src/model_registry.py
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src import artifacts
+from src.features import MODEL_FEATURES
+from src.flat_forest import FlatForest
+from src.preprocess import FusedPreprocessor
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of model components per disease.
+
+    - Components are loaded once, on first use, from the disease's
+      versioned artifact (models/<disease>/CURRENT, see src/artifacts.py):
+      'predictor' is the flat forest and 'preprocess' the fused
+      imputer+scaler, both over memory-mapped arrays; 'meta' is the manifest
+    - A version whose hashes do not match its manifest, or whose features
+      differ from MODEL_FEATURES[disease], is rejected
+    - At most `max_entries` diseases are kept (least recently used evicted)
+    - Switching CURRENT reloads the disease and swaps it in atomically;
+      readers keep the old components until the swap, and a rejected
+      version leaves the loaded one serving
+    - Every load stamps the components with a new 'generation' number, so
+      anything derived from a model (cached results) can tell it is stale
+    - A disease with no artifact is remembered as missing (with its own
+      generation number) and logged once; until the pointer is re-checked
+      after `check_interval`, get() raises without touching the disk
+    """
+
+    def __init__(self, model_dir=artifacts.MODEL_DIR, max_entries=8, check_interval=1.0, verify=True):
+        self.model_dir = model_dir
+        self.verify = verify
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._missing = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._generations = itertools.count(1)
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+        self.missing_hits = 0
+
+    # ---------------------------
+    # File helpers
+    # ---------------------------
+    def _mtime(self, disease):
+        return os.stat(artifacts.pointer_path(disease, self.model_dir)).st_mtime_ns
+
+    def _load(self, disease):
+        try:
+            mtime = self._mtime(disease)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No model artifact for {disease} in {self.model_dir}") from None
+        version_dir = artifacts.current_path(disease, self.model_dir)
+        manifest, arrays = artifacts.load_artifact(version_dir, mmap=True, verify=self.verify)
+
+        # A model trained on another column order would silently score the
+        # wrong values
+        expected = list(MODEL_FEATURES.get(disease, []))
+        if manifest.get("features") != expected or manifest.get("n_features") != len(expected):
+            raise ValueError(
+                f"Feature mismatch in {version_dir}: manifest has {manifest.get('features')}, "
+                f"expected {expected}"
+            )
+
+        preprocess = artifacts.split_arrays(arrays, "preprocess")
+        components = {
+            "predictor": FlatForest(artifacts.split_arrays(arrays, "forest")),
+            "preprocess": FusedPreprocessor(
+                preprocess["fill"], preprocess["mean"], preprocess["scale"], preprocess["keep"]
+            ),
+            "meta": manifest,
+        }
+        return {
+            "components": components,
+            "mtime": mtime,
+            "checked_at": time.monotonic(),
+        }
+
+    # ---------------------------
+    # Public interface
+    # ---------------------------
+    def get(self, disease):
+        """
+        Return {'predictor', 'preprocess', 'meta', 'generation'} for a disease.
+        Raises FileNotFoundError if the disease has no artifact, ValueError
+        if its current version is rejected and nothing is loaded yet.
+        """
+        entry = self._lookup(disease)
+        if entry is not None and not self._is_stale(disease, entry):
+            return entry["components"]
+        if entry is None:
+            self._raise_if_missing(disease)
+
+        with self._load_lock(disease):
+            # Another thread may have reloaded while we waited
+            entry = self._lookup(disease, count=False)
+            if entry is not None and not self._is_stale(disease, entry):
+                return entry["components"]
+            if entry is None:
+                self._raise_if_missing(disease)
+
+            try:
+                new_entry = self._load(disease)
+            except FileNotFoundError as e:
+                if entry is None:
+                    self._remember_missing(disease, e)
+                raise
+            except Exception as e:
+                if entry is None:
+                    raise
+                # Corrupt or mismatched version: keep the old components
+                print(f"[Error] Reload failed for {disease}, keeping loaded model: {e}")
+                entry["checked_at"] = time.monotonic()
+                return entry["components"]
+
+            with self._lock:
+                self._missing.pop(disease, None)
+                new_entry["components"]["generation"] = next(self._generations)
+                self._entries[disease] = new_entry
+                self._entries.move_to_end(disease)
+                self.loads += 1
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return new_entry["components"]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": list(self._entries.keys()),
+                "max_entries": self.max_entries,
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "missing": {disease: miss["generation"] for disease, miss in self._missing.items()},
+                "missing_hits": self.missing_hits,
+            }
+
+    # ---------------------------
+    # Internal helpers
+    # ---------------------------
+    def _lookup(self, disease, count=True):
+        with self._lock:
+            entry = self._entries.get(disease)
+            if entry is not None:
+                self._entries.move_to_end(disease)
+                if count:
+                    self.hits += 1
+            return entry
+
+    def _raise_if_missing(self, disease):
+        """Raise the remembered FileNotFoundError if the pointer was checked recently"""
+        with self._lock:
+            miss = self._missing.get(disease)
+            if miss is None or time.monotonic() - miss["checked_at"] >= self.check_interval:
+                return
+            self.missing_hits += 1
+        raise FileNotFoundError(miss["message"])
+
+    def _remember_missing(self, disease, error):
+        with self._lock:
+            miss = self._missing.get(disease)
+            if miss is not None:
+                miss["checked_at"] = time.monotonic()
+                return
+            generation = next(self._generations)
+            self._missing[disease] = {
+                "generation": generation,
+                "message": str(error),
+                "checked_at": time.monotonic(),
+            }
+        # Logged once per missing generation, not once per request
+        print(f"[Warning] {error}; {disease} predictions are unavailable until one is published")
+
+    def _is_stale(self, disease, entry):
+        now = time.monotonic()
+        if now - entry["checked_at"] < self.check_interval:
+            return False
+        try:
+            mtime = self._mtime(disease)
+        except OSError:
+            # Files removed mid-deploy: keep serving what is loaded
+            return False
+        if mtime != entry["mtime"]:
+            return True
+        entry["checked_at"] = now
+        return False
+
+    def _load_lock(self, disease):
+        with self._lock:
+            return self._load_locks.setdefault(disease, threading.Lock())
+
+
+MODEL_REGISTRY = ModelRegistry(
+    max_entries=int(os.environ.get("MODEL_CACHE_SIZE", 8)),
+    check_interval=float(os.environ.get("MODEL_RELOAD_INTERVAL", 1.0)),
+    verify=os.environ.get("MODEL_VERIFY_HASH", "1") != "0",
+)
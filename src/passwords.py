@@ -0,0 +1,188 @@
+# src/passwords.py
+#
+# Password hashing off the request thread. PBKDF2 and bcrypt are meant to be
+# slow; running them on a small dedicated pool caps how much CPU a login
+# burst can take from /predict. hashlib.pbkdf2_hmac and bcrypt both release
+# the GIL, so worker threads hash in parallel with request handling.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+try:
+    import bcrypt
+    _HAS_BCRYPT = True
+except Exception:
+    bcrypt = None
+    _HAS_BCRYPT = False
+
+DEFAULT_ITERATIONS = 1_000_000
+
+# Rehash-on-login only replaces hashes known to be weaker than the
+# configured pbkdf2 cost; scrypt and unrecognised formats are kept
+PBKDF2_DIGESTS = ("sha256", "sha512")
+# werkzeug's pbkdf2 count when the method string has none
+PBKDF2_IMPLICIT_ITERATIONS = 600_000
+MIN_BCRYPT_COST = 12
+# werkzeug < 2.3 salted digests ("sha1$salt$hash"), no key stretching
+LEGACY_METHODS = ("plain", "md5", "sha1", "sha224", "sha256", "sha384", "sha512")
+
+
+class HasherBusy(Exception):
+    """Raised when too many hash jobs are already waiting"""
+
+
+def hash_method(iterations=DEFAULT_ITERATIONS):
+    return f"pbkdf2:sha256:{int(iterations)}"
+
+
+def _as_text(stored_hash):
+    if isinstance(stored_hash, (bytes, bytearray)):
+        try:
+            return bytes(stored_hash).decode("utf-8")
+        except UnicodeDecodeError:
+            return bytes(stored_hash)
+    return stored_hash
+
+
+def is_bcrypt_hash(stored_hash):
+    prefix = b"$2" if isinstance(stored_hash, (bytes, bytearray)) else "$2"
+    return stored_hash.startswith(prefix)
+
+
+def check_password(stored_hash, password):
+    """
+    Verify against a werkzeug (pbkdf2/scrypt) or bcrypt hash.
+    Raises RuntimeError if a bcrypt hash is found without the bcrypt module
+    and ValueError for a malformed werkzeug hash.
+    """
+    stored_hash = _as_text(stored_hash)
+    if is_bcrypt_hash(stored_hash):
+        if not _HAS_BCRYPT:
+            raise RuntimeError("bcrypt not available")
+        hash_bytes = stored_hash if isinstance(stored_hash, bytes) else stored_hash.encode("utf-8")
+        return bcrypt.checkpw(password.encode("utf-8"), hash_bytes)
+    return check_password_hash(stored_hash, password)
+
+
+class PasswordHasher:
+    """
+    Bounded executor for password hashing.
+    At most `workers` hashes run at once and at most `max_pending` may be
+    queued or running; beyond that submit() raises HasherBusy instead of
+    letting requests pile up behind the pool.
+    """
+
+    def __init__(self, workers=2, max_pending=32, iterations=DEFAULT_ITERATIONS, timeout=10.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.iterations = int(iterations)
+        self.method = hash_method(iterations)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    # ---------------------------
+    # Jobs
+    # ---------------------------
+    def submit(self, fn, *args):
+        """Run fn(*args) on the pool; returns a Future"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy("Password hashing queue is full")
+        with self._lock:
+            self._pending += 1
+        queued_at = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._pending -= 1
+                    self.completed += 1
+                    self.wait_seconds += started - queued_at
+                    self.run_seconds += finished - started
+                self._slots.release()
+
+        try:
+            return self._executor.submit(run)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+            raise
+
+    def hash_async(self, password):
+        return self.submit(generate_password_hash, password, self.method)
+
+    def _result(self, future):
+        try:
+            return future.result(self.timeout)
+        except FutureTimeout:
+            raise HasherBusy("Password hashing timed out")
+
+    def hash(self, password):
+        """Hash with the configured cost; blocks the caller, not the CPU"""
+        return self._result(self.hash_async(password))
+
+    def verify(self, stored_hash, password):
+        """(matches, needs_rehash) for a stored hash"""
+        ok = self._result(self.submit(check_password, stored_hash, password))
+        return ok, ok and self.needs_rehash(stored_hash)
+
+    def needs_rehash(self, stored_hash):
+        """
+        True only for hashes weaker than the configured method: pbkdf2 with
+        fewer iterations or a weak digest, bcrypt below MIN_BCRYPT_COST, or
+        unstretched legacy werkzeug digests
+        """
+        stored_hash = _as_text(stored_hash)
+        if not isinstance(stored_hash, str):
+            return False
+        if is_bcrypt_hash(stored_hash):
+            # $2b$<cost>$<salt+hash>
+            cost = stored_hash.split("$")[2:3]
+            return bool(cost) and cost[0].isdigit() and int(cost[0]) < MIN_BCRYPT_COST
+        method = stored_hash.split("$", 1)[0]
+        if method in LEGACY_METHODS:
+            return True
+        parts = method.split(":")
+        if parts[0] != "pbkdf2":
+            return False
+        if len(parts) < 2 or parts[1] not in PBKDF2_DIGESTS:
+            return True
+        iterations = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else PBKDF2_IMPLICIT_ITERATIONS
+        return iterations < self.iterations
+
+    # ---------------------------
+    # Metrics
+    # ---------------------------
+    def stats(self):
+        with self._lock:
+            completed = self.completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "method": self.method,
+                "pending": self._pending,
+                "queued": max(0, self._pending - self.workers),
+                "completed": completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(1000 * self.wait_seconds / completed, 2) if completed else 0.0,
+                "avg_run_ms": round(1000 * self.run_seconds / completed, 2) if completed else 0.0,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
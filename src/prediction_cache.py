@@ -0,0 +1,76 @@
+# src/prediction_cache.py
+#
+# Cache of prediction results in front of the rule engine and the ML
+# models. Screening traffic repeats exact value combinations (form
+# defaults, re-submissions, test panels), so results are keyed on the
+# canonical feature vector rather than the raw form strings: "5", "5.0"
+# and " 5" all hit the same entry.
+
+import threading
+
+import numpy as np
+
+from src.auth_cache import TTLCache
+
+
+def feature_key(values):
+    """Canonical bytes for a feature vector (float64; -0.0 folded into 0.0)"""
+    return (np.asarray(values, dtype=np.float64).reshape(-1) + 0.0).tobytes()
+
+
+class PredictionCache:
+    """
+    LRU/TTL cache of results keyed on (source, disease, version, feature vector).
+
+    source is what produced the result ('rule' or 'ml'), so a disease
+    served by both (kidney) never shares entries between them. version
+    identifies the producer's state (rule-table hash, model load
+    generation). When a (source, disease) is seen with a new version its
+    old entries are dropped, so a reloaded model never serves stale results.
+    """
+
+    def __init__(self, max_entries=10000, ttl=600.0):
+        self._cache = TTLCache(ttl, max_entries)
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _check_version(self, source, disease, version):
+        seen = self._versions.get((source, disease))
+        if seen != version:
+            if seen is not None:
+                self.invalidations += self._cache.discard_where(
+                    lambda key: key[0] == source and key[1] == disease
+                )
+            self._versions[(source, disease)] = version
+
+    def get(self, source, disease, version, key):
+        """Cached value or None"""
+        with self._lock:
+            self._check_version(source, disease, version)
+            value = self._cache.get((source, disease, key))
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return value
+
+    def put(self, source, disease, version, key, value):
+        with self._lock:
+            self._check_version(source, disease, version)
+            self._cache.set((source, disease, key), value)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "max_entries": self._cache.max_entries,
+                "ttl": self._cache.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
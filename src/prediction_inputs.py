@@ -0,0 +1,70 @@
+# src/prediction_inputs.py
+#
+# Storage format for prediction inputs. predictions.input_data holds the
+# submitted form as canonical JSON; every MODEL_FEATURES value is also kept
+# in prediction_features (one row per feature) so cohort queries such as
+# "kidney predictions with hemo < 12" run in SQL against an index.
+
+import ast
+import json
+import math
+
+from src.features import MODEL_FEATURES, parse_feature
+
+INSERT_FEATURE_SQL = (
+    "INSERT OR REPLACE INTO prediction_features "
+    "(prediction_id, disease, feature, value_num, value_text) VALUES (?, ?, ?, ?, ?)"
+)
+
+COHORT_SQL = (
+    "SELECT p.id, p.user_id, p.disease, p.timestamp, p.input_data, p.result, f.value_num "
+    "FROM prediction_features f JOIN predictions p ON p.id = f.prediction_id "
+    "WHERE f.disease = ? AND f.feature = ? AND f.value_num >= ? AND f.value_num < ? "
+    "ORDER BY f.value_num"
+)
+
+
+def canonical_json(inputs):
+    """Stable JSON text for an input dict (sorted keys, no whitespace)"""
+    return json.dumps(inputs, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def parse_stored_inputs(text):
+    """
+    Decode predictions.input_data. Handles canonical JSON as well as the
+    Python dict repr written by older versions. Returns a dict or None.
+    """
+    if not text:
+        return None
+    try:
+        value = json.loads(text)
+    except ValueError:
+        try:
+            value = ast.literal_eval(text)
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return None
+    return value if isinstance(value, dict) else None
+
+
+def feature_rows(disease, inputs):
+    """[(feature, value_num, value_text)] for the MODEL_FEATURES present in inputs"""
+    rows = []
+    for feature in MODEL_FEATURES.get(disease, ()):
+        raw = inputs.get(feature)
+        if raw is None:
+            continue
+        value = parse_feature(raw)
+        rows.append((feature, None if math.isnan(value) else value, str(raw)))
+    return rows
+
+
+def insert_features(conn, prediction_id, disease, inputs):
+    conn.executemany(
+        INSERT_FEATURE_SQL,
+        [(prediction_id, disease, f, num, text) for f, num, text in feature_rows(disease, inputs)],
+    )
+
+
+def find_cohort(conn, disease, feature, lower=-math.inf, upper=math.inf):
+    """Predictions for `disease` whose numeric `feature` lies in [lower, upper)"""
+    return conn.execute(COHORT_SQL, (disease, feature, lower, upper)).fetchall()
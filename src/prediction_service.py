@@ -1,61 +1,36 @@
 # src/prediction_service.py
 
-import os
-import pickle
 import numpy as np
 
 # Rule-based imports
-from rule_based.thyroid_rules import predict_thyroid
-from rule_based.pneumonia_rules import predict_pneumonia
-from rule_based.malaria_rules import predict_malaria
+from rule_based.engine import RULE_ENGINE
 
-# Models folder
-MODEL_DIR = os.path.join(os.path.dirname(__file__), "../models")
+# Shared model cache (also used by app.py)
+from src.model_registry import MODEL_REGISTRY
+from src.inference import predict_with_threshold
 
 # ---------------------------
 # Model-based prediction (4 diseases)
 # ---------------------------
-def load_model_files(disease):
-    try:
-        model_path = os.path.join(MODEL_DIR, f"{disease}_model.pkl")
-        scaler_path = os.path.join(MODEL_DIR, f"{disease}_scaler.pkl")
-        imputer_path = os.path.join(MODEL_DIR, f"{disease}_imputer.pkl")
-
-        if not all(os.path.exists(p) for p in [model_path, scaler_path, imputer_path]):
-            raise FileNotFoundError(f"Model files missing for {disease}")
-
-        with open(model_path, "rb") as f:
-            model = pickle.load(f)
-        with open(scaler_path, "rb") as f:
-            scaler = pickle.load(f)
-        with open(imputer_path, "rb") as f:
-            imputer = pickle.load(f)
-
-        return model, scaler, imputer
-    except Exception as e:
-        print(f"[Error] Failed to load model files for {disease}: {e}")
-        return None, None, None
-
-
 def predict_model(disease, input_features):
     """
     disease: str -> 'diabetes', 'liver', 'kidney'
     input_features: list or np.array of input values
     """
-    model, scaler, imputer = load_model_files(disease)
-    if not model:
+    try:
+        components = MODEL_REGISTRY.get(disease)
+    except Exception as e:
+        print(f"[Error] Failed to load model files for {disease}: {e}")
         return None
 
     try:
         # Convert to 2D array
-        arr = np.array(input_features).reshape(1, -1)
-        # Impute missing values
-        arr = imputer.transform(arr)
-        # Scale features
-        arr = scaler.transform(arr)
-        # Predict
-        pred = model.predict(arr)
-        return pred[0]
+        arr = np.array(input_features, dtype=np.float64).reshape(1, -1)
+        # Impute missing values and scale features in one step
+        arr = components["preprocess"].transform(arr, copy=False)
+        # Predict (one probability pass + per-disease threshold)
+        labels, _ = predict_with_threshold(components, arr)
+        return labels[0]
     except Exception as e:
         print(f"[Error] Prediction failed for {disease}: {e}")
         return None
@@ -70,14 +45,9 @@ def predict_rule_based(disease, input_dict):
     input_dict: dictionary of features
     """
     try:
-        if disease == "thyroid":
-            return predict_thyroid(input_dict)
-        elif disease == "pneumonia":
-            return predict_pneumonia(input_dict)
-        elif disease == "malaria":
-            return predict_malaria(input_dict)
-        else:
+        if disease not in ["thyroid", "pneumonia", "malaria"]:
             raise ValueError("Unknown rule-based disease")
+        return RULE_ENGINE[disease].predict_one(input_dict)
     except Exception as e:
         print(f"[Error] Rule-based prediction failed for {disease}: {e}")
         return None
@@ -0,0 +1,64 @@
+# src/preprocess.py
+
+import numpy as np
+
+
+class FusedPreprocessor:
+    """
+    SimpleImputer(strategy='mean') + StandardScaler collapsed into three
+    vectors: NaN fill values, mean and scale. transform() gives the same
+    result as imputer.transform() followed by scaler.transform().
+    """
+
+    def __init__(self, fill, mean, scale, keep=None):
+        self.fill = np.asarray(fill, dtype=np.float64)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        # Columns kept by the imputer (all-NaN training columns are dropped)
+        self.keep = None if keep is None or np.all(keep) else np.flatnonzero(keep)
+        self.n_features_in_ = len(self.fill) if keep is None else len(keep)
+
+    def transform(self, X, copy=True):
+        """
+        X: (n_rows, n_features) or (n_features,) array, NaN = missing
+        Returns the scaled float64 matrix. With copy=False a float64 input
+        is modified in place.
+        """
+        X = np.array(X, dtype=np.float64) if copy else np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.keep is not None:
+            X = X[:, self.keep]
+        # Same operation order as sklearn: fill, subtract mean, divide scale
+        np.copyto(X, self.fill, where=np.isnan(X))
+        X -= self.mean
+        X /= self.scale
+        return X
+
+    def to_arrays(self):
+        keep = np.ones(self.n_features_in_, dtype=bool)
+        if self.keep is not None:
+            keep[:] = False
+            keep[self.keep] = True
+        return {"fill": self.fill, "mean": self.mean, "scale": self.scale, "keep": keep}
+
+
+def fuse_preprocessing(imputer, scaler):
+    """Build a FusedPreprocessor from fitted SimpleImputer and StandardScaler"""
+    missing = imputer.missing_values
+    if not (isinstance(missing, float) and np.isnan(missing)):
+        raise ValueError("Only NaN missing_values can be fused")
+    if getattr(imputer, "add_indicator", False):
+        raise ValueError("Imputers with add_indicator cannot be fused")
+
+    statistics = np.asarray(imputer.statistics_, dtype=np.float64)
+    keep = ~np.isnan(statistics)
+    if getattr(imputer, "keep_empty_features", False):
+        keep[:] = True
+        statistics = np.where(np.isnan(statistics), 0.0, statistics)
+
+    n_out = int(keep.sum())
+    mean = scaler.mean_ if getattr(scaler, "with_mean", True) and scaler.mean_ is not None else np.zeros(n_out)
+    scale = scaler.scale_ if getattr(scaler, "with_std", True) and scaler.scale_ is not None else np.ones(n_out)
+
+    return FusedPreprocessor(statistics[keep], mean, scale, keep)
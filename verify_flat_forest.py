@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from src import artifacts
+from src.features import MODEL_FEATURES
+from src.flat_forest import FlatForest, flatten_forest
+from src.model_registry import ModelRegistry
+
+# Random rows per disease on top of the training CSV rows
+N_ROWS = 5000
+
+print("=" * 70)
+print("VERIFYING FLAT FORESTS AGAINST THE SKLEARN CHECKPOINTS")
+print("=" * 70)
+
+
+def sample_inputs(disease, rng):
+    """Training rows plus rows scaled around them, with some values missing"""
+    df = pd.read_csv(f"data/{disease}_simple.csv")
+    X = df[MODEL_FEATURES[disease]].to_numpy(dtype=np.float64)
+    noisy = X[rng.integers(0, len(X), N_ROWS)] * rng.uniform(0.5, 1.5, (N_ROWS, X.shape[1]))
+    noisy[rng.random(noisy.shape) < 0.05] = np.nan
+    return np.vstack([X, noisy])
+
+
+failed = False
+rng = np.random.default_rng(0)
+registry = ModelRegistry(verify=True)
+for disease in MODEL_FEATURES:
+    version_dir = artifacts.current_path(disease)
+    if version_dir is None:
+        print(f"\n- {disease}: no model artifact, skipped")
+        continue
+
+    checkpoint = artifacts.load_checkpoint(version_dir)
+    model, imputer, scaler = checkpoint['model'], checkpoint['imputer'], checkpoint['scaler']
+    X = sample_inputs(disease, rng)
+    # Columns by position, as served; named as the imputer saw them at fit time
+    columns = getattr(imputer, 'feature_names_in_', MODEL_FEATURES[disease])
+    X_scaled = scaler.transform(imputer.transform(pd.DataFrame(X, columns=columns)))
+    expected = model.predict_proba(X_scaled)
+
+    served = registry.get(disease)
+    checks = {
+        # Flattening code as it is now, on the checkpointed model
+        'flatten_forest': FlatForest(flatten_forest(model)).predict_proba(X_scaled),
+        # Published arrays through the app's loader and fused preprocessing
+        'served artifact': served['predictor'].predict_proba(served['preprocess'].transform(X)),
+    }
+
+    problems = [name for name, proba in checks.items() if not np.array_equal(proba, expected)]
+    if problems:
+        failed = True
+        for name in problems:
+            diff = np.abs(checks[name] - expected).max()
+            print(f"\n✗ {disease} ({os.path.basename(version_dir)}): {name} differs, max |Δp| = {diff:.3g}")
+    else:
+        print(f"\n✓ {disease} ({os.path.basename(version_dir)}): {len(X)} rows, "
+              f"{len(model.estimators_)} trees, probabilities bit-identical")
+
+print("\n" + "=" * 70)
+if failed:
+    print("❌ FLAT FOREST DOES NOT MATCH SKLEARN")
+    sys.exit(1)
+print("✅ Flat forests match RandomForestClassifier.predict_proba exactly")
@@ -0,0 +1,381 @@
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+
+from rule_based.engine import RULE_TABLES, RuleSet
+from rule_based.relabel import encode_frame
+
+# Rows sampled per table
+N_ROWS = 5000
+
+# Training CSV used for healthy base rows, when not data/<table>_simple.csv
+DATA_FILES = {'kidney_sanity': 'kidney'}
+
+TEXT_CELLS = ['', ' ', 'abc', 'nan', 'inf', '-inf', '1e400', 'None', 'none', 'Present', ' Severe',
+              'Male', 'female', 'high', 'Normal', '0', '1', '2', '-1', ' 5 ', '1e2']
+
+print("=" * 70)
+print("VERIFYING RULE ENGINE AGAINST THE ORIGINAL RULE FUNCTIONS")
+print("=" * 70)
+
+
+# ---------------------------
+# Reference: the rule functions as they were before the range tables
+# (app.py at 36da029), frozen here on purpose. Do not edit these to make
+# the engine pass; a difference is a behaviour change at /predict.
+# ---------------------------
+def thyroid_rule(inputs):
+    try:
+        age = float(inputs.get('Age', 0))
+        sex_input = inputs.get('Sex', '').strip()
+        if sex_input.lower() == 'male':
+            sex = 0
+        elif sex_input.lower() == 'female':
+            sex = 1
+        else:
+            try:
+                sex = int(sex_input)
+            except:
+                return "Risky"
+        tsh = float(inputs.get('TSH', 0))
+        t3 = float(inputs.get('T3', 0))
+        t4 = float(inputs.get('T4', 0))
+        thyroxine_input = inputs.get('Thyroxine', '').strip()
+        if thyroxine_input.lower() in ['normal', 'none', '0']:
+            thyroxine = 0
+        elif thyroxine_input.lower() in ['high', 'low', 'abnormal', '1']:
+            thyroxine = 1
+        else:
+            try:
+                thyroxine = int(thyroxine_input)
+            except:
+                return "Risky"
+    except:
+        return "Risky"
+    if age <= 0 or age > 120:
+        return "Risky"
+    if sex not in [0, 1]:
+        return "Risky"
+    if tsh < 0.4 or tsh > 4.0:
+        return "Risky"
+    if t3 < 80 or t3 > 200:
+        return "Risky"
+    if t4 < 4.5 or t4 > 12:
+        return "Risky"
+    if thyroxine == 1:
+        return "Risky"
+    return "Normal"
+
+
+def _symptom(text):
+    if text.lower() == 'none':
+        return 0
+    elif text.lower() == 'present':
+        return 1
+    elif text.lower() == 'severe':
+        return 2
+    return int(text)
+
+
+def malaria_rule(inputs):
+    try:
+        temp = float(inputs.get('Temperature', 0))
+        headache = _symptom(str(inputs.get('Headache', '0')).strip())
+        vomiting = _symptom(str(inputs.get('Vomiting', '0')).strip())
+        joint_pain_input = str(inputs.get('JointPain', '0')).strip() if 'JointPain' in inputs else str(inputs.get('Joint_Pain', '0')).strip()
+        joint_pain = _symptom(joint_pain_input)
+        rbc = float(inputs.get('RBC', 0))
+    except:
+        return "Risky"
+    if temp > 38:
+        return "Risky"
+    if headache > 0:
+        return "Risky"
+    if vomiting > 0:
+        return "Risky"
+    if joint_pain > 0:
+        return "Risky"
+    if rbc < 4.2:
+        return "Risky"
+    return "Normal"
+
+
+def pneumonia_rule(inputs):
+    try:
+        age = float(inputs.get('Age', 0))
+        cough_input = inputs.get('CoughSeverity', '0').strip().lower()
+        if cough_input == 'none':
+            cough_severity = 0
+        elif cough_input == 'present':
+            cough_severity = 1
+        else:
+            cough_severity = int(cough_input)
+        fever = float(inputs.get('Fever', 0))
+        wbc = float(inputs.get('WBC', 0))
+        oxygen = float(inputs.get('OxygenSaturation', 0)) if 'OxygenSaturation' in inputs else float(inputs.get('Oxygen_Saturation', 0))
+    except:
+        return "Risky"
+    if age > 50:
+        return "Risky"
+    if cough_severity > 0:
+        return "Risky"
+    if fever > 38:
+        return "Risky"
+    wbc_normalized = wbc if wbc > 100 else wbc * 1000
+    if wbc_normalized > 10000:
+        return "Risky"
+    if oxygen < 94:
+        return "Risky"
+    return "Normal"
+
+
+def kidney_rule(inputs):
+    try:
+        sg = float(inputs.get('sg', 0))
+        al = float(inputs.get('al', 0))
+        rbc = float(inputs.get('rbc', 0))
+        pc = float(inputs.get('pc', 0))
+        hemo = float(inputs.get('hemo', 0))
+        wc = float(inputs.get('wc', 0))
+        rc = float(inputs.get('rc', 0))
+        bp = float(inputs.get('bp', 0))
+    except:
+        return "Risky"
+    if sg < 1.005 or sg > 1.030:
+        return "Risky"
+    if al < 3.4 or al > 5.4:
+        return "Risky"
+    if rbc < 4.2 or rbc > 6.1:
+        return "Risky"
+    pc_normalized = pc if pc > 450 else pc * 1000
+    if pc_normalized < 150000 or pc_normalized > 450000:
+        return "Risky"
+    if hemo < 12 or hemo > 18:
+        return "Risky"
+    wc_normalized = wc if wc > 100 else wc * 1000
+    if wc_normalized < 4000 or wc_normalized > 10000:
+        return "Risky"
+    if rc < 4.2 or rc > 6.1:
+        return "Risky"
+    if bp < 90 or bp >= 140:
+        return "Risky"
+    return "Normal"
+
+
+def liver_rule(inputs):
+    try:
+        age = float(str(inputs.get('Age', 0)).strip())
+        tb = float(str(inputs.get('Total_Bilirubin', 0)).strip())
+        db = float(str(inputs.get('Direct_Bilirubin', 0)).strip())
+        alkphos = float(str(inputs.get('Alkaline_Phosphotase', 0)).strip())
+        sgpt = float(str(inputs.get('Alamine_Aminotransferase', 0)).strip())
+        sgot = float(str(inputs.get('Aspartate_Aminotransferase', 0)).strip())
+    except Exception:
+        return "Risky"
+    if age <= 0 or age > 120:
+        return "Risky"
+    if age > 50:
+        return "Risky"
+    if tb < 0.1 or tb > 1.2:
+        return "Risky"
+    if db < 0 or db > 0.3:
+        return "Risky"
+    if alkphos < 44 or alkphos > 147:
+        return "Risky"
+    if sgpt < 7 or sgpt > 56:
+        return "Risky"
+    if sgot < 10 or sgot > 40:
+        return "Risky"
+    return "Normal"
+
+
+def kidney_sanity_rule(inputs):
+    """The inline 'MEDICAL SANITY LOGIC (KIDNEY ONLY)' block of predict()"""
+    try:
+        sg = float(inputs.get('sg', 0))
+        al = float(inputs.get('al', 0))
+        rbc = float(inputs.get('rbc', 0))
+        pc = float(inputs.get('pc', 0))
+        hemo = float(inputs.get('hemo', 0))
+        wc = float(inputs.get('wc', 0))
+        rc = float(inputs.get('rc', 0))
+        bp = float(inputs.get('bp', 0))
+    except:
+        result = "Risky"
+    else:
+        if sg < 1.005 or sg > 1.030:
+            result = "Risky"
+        elif al > 2:
+            result = "Risky"
+        elif rbc < 3.5 or rbc > 5.5:
+            result = "Risky"
+        elif pc < 150 or pc > 450:
+            result = "Risky"
+        elif hemo < 13.5 or hemo > 17.5:
+            result = "Risky"
+        elif wc < 4000 or wc > 11000:
+            result = "Risky"
+        elif rc < 4.2 or rc > 5.4:
+            result = "Risky"
+        elif bp < 90 or bp > 140:
+            result = "Risky"
+        else:
+            result = "Normal"
+    return result
+
+
+REFERENCE = {
+    'thyroid': thyroid_rule,
+    'malaria': malaria_rule,
+    'pneumonia': pneumonia_rule,
+    'kidney': kidney_rule,
+    'liver': liver_rule,
+    'kidney_sanity': kidney_sanity_rule,
+}
+
+# Input keys per feature, as the original functions read them
+KEYS = {
+    'thyroid': {'Age': ['Age'], 'Sex': ['Sex'], 'TSH': ['TSH'], 'T3': ['T3'], 'T4': ['T4'], 'Thyroxine': ['Thyroxine']},
+    'malaria': {'Temperature': ['Temperature'], 'Headache': ['Headache'], 'Vomiting': ['Vomiting'],
+                'JointPain': ['JointPain', 'Joint_Pain'], 'RBC': ['RBC']},
+    'pneumonia': {'Age': ['Age'], 'CoughSeverity': ['CoughSeverity'], 'Fever': ['Fever'], 'WBC': ['WBC'],
+                  'OxygenSaturation': ['OxygenSaturation', 'Oxygen_Saturation']},
+    'kidney': {name: [name] for name in ['sg', 'al', 'rbc', 'pc', 'hemo', 'wc', 'rc', 'bp']},
+    'liver': {name: [name] for name in ['Age', 'Total_Bilirubin', 'Direct_Bilirubin', 'Alkaline_Phosphotase',
+                                        'Alamine_Aminotransferase', 'Aspartate_Aminotransferase']},
+}
+KEYS['kidney_sanity'] = KEYS['kidney']
+
+# Thresholds of the original functions, per feature. For WBC/wc/pc these
+# include the unit-scale switch (100, 450) and the bounds in both units.
+BOUNDS = {
+    'thyroid': {'Age': [0, 120], 'TSH': [0.4, 4.0], 'T3': [80, 200], 'T4': [4.5, 12]},
+    'malaria': {'Temperature': [38], 'RBC': [4.2]},
+    'pneumonia': {'Age': [50], 'Fever': [38], 'WBC': [10, 100, 10000], 'OxygenSaturation': [94]},
+    'kidney': {'sg': [1.005, 1.030], 'al': [3.4, 5.4], 'rbc': [4.2, 6.1], 'pc': [150, 450, 150000, 450000],
+               'hemo': [12, 18], 'wc': [4, 10, 100, 4000, 10000], 'rc': [4.2, 6.1], 'bp': [90, 140]},
+    'liver': {'Age': [0, 50, 120], 'Total_Bilirubin': [0.1, 1.2], 'Direct_Bilirubin': [0, 0.3],
+              'Alkaline_Phosphotase': [44, 147], 'Alamine_Aminotransferase': [7, 56],
+              'Aspartate_Aminotransferase': [10, 40]},
+    'kidney_sanity': {'sg': [1.005, 1.030], 'al': [2], 'rbc': [3.5, 5.5], 'pc': [150, 450], 'hemo': [13.5, 17.5],
+                      'wc': [4000, 11000], 'rc': [4.2, 5.4], 'bp': [90, 140]},
+}
+
+# One row inside every range, per function
+HEALTHY = {
+    'thyroid': {'Age': '30', 'Sex': 'Female', 'TSH': '2', 'T3': '120', 'T4': '8', 'Thyroxine': 'Normal'},
+    'malaria': {'Temperature': '36.8', 'Headache': 'None', 'Vomiting': '0', 'JointPain': 'none', 'RBC': '5'},
+    'pneumonia': {'Age': '30', 'CoughSeverity': 'none', 'Fever': '37', 'WBC': '7', 'OxygenSaturation': '98'},
+    'kidney': {'sg': '1.02', 'al': '4', 'rbc': '5', 'pc': '250', 'hemo': '15', 'wc': '7000', 'rc': '5', 'bp': '120'},
+    'liver': {'Age': '35', 'Total_Bilirubin': '0.8', 'Direct_Bilirubin': '0.2', 'Alkaline_Phosphotase': '90',
+              'Alamine_Aminotransferase': '30', 'Aspartate_Aminotransferase': '25'},
+    'kidney_sanity': {'sg': '1.02', 'al': '1', 'rbc': '4.5', 'pc': '250', 'hemo': '15', 'wc': '7000', 'rc': '5',
+                      'bp': '120'},
+}
+
+
+def near(bound):
+    """The bound and the closest floats on either side, as exact strings"""
+    return [repr(float(v)) for v in (np.nextafter(bound, -np.inf), bound, np.nextafter(bound, np.inf))]
+
+
+def healthy_rows(disease):
+    """Normal rows (per the reference) from the disease's training CSV, plus HEALTHY"""
+    df = pd.read_csv(f"data/{DATA_FILES.get(disease, disease)}_simple.csv", dtype=str, keep_default_na=False)
+    names = [name for name in KEYS[disease] if name in df.columns]
+    rows = [{name: record[name] for name in names} for record in df.to_dict('records')]
+    rows = [row for row in rows if len(row) == len(KEYS[disease]) and REFERENCE[disease](row) == "Normal"]
+    return rows + [HEALTHY[disease]]
+
+
+def sample_rows(disease, bases, rng):
+    """
+    Healthy rows with about one cell in four replaced by a bound or its
+    neighbouring float, a random number, or text/blank input; a few cells are
+    left out (so defaults apply) and each feature is sent under a random one
+    of its input keys
+    """
+    edges = {name: [v for bound in bounds for v in near(bound)] for name, bounds in BOUNDS[disease].items()}
+    rows = []
+    for _ in range(N_ROWS):
+        base = rng.choice(bases)
+        row = {}
+        for name, keys in KEYS[disease].items():
+            key = rng.choice(keys)
+            choice = rng.random()
+            if choice < 0.02:
+                continue
+            elif choice < 0.05:
+                row[key] = rng.choice(TEXT_CELLS)
+            elif choice < 0.17 and name in edges:
+                row[key] = rng.choice(edges[name])
+            elif choice < 0.25:
+                row[key] = str(round(rng.uniform(-1, 2) * max(BOUNDS[disease].get(name, [1])), 3))
+            else:
+                row[key] = base[name]
+        rows.append(row)
+    # Every bound of every feature on an otherwise healthy row
+    for name, values in edges.items():
+        for value in values:
+            for key in KEYS[disease][name]:
+                row = {k: v for k, v in HEALTHY[disease].items() if k != name}
+                row[key] = value
+                rows.append(row)
+    return rows
+
+
+failed = False
+rng = random.Random(0)
+for disease, table in RULE_TABLES.items():
+    if disease not in REFERENCE:
+        failed = True
+        print(f"\n✗ {disease}: no reference function")
+        continue
+    rows = sample_rows(disease, healthy_rows(disease), rng)
+    expected = [REFERENCE[disease](row) for row in rows]
+
+    rules = RuleSet(disease, table)
+    scalar = [rules.predict_one(row) for row in rows]
+    fired_scalar = [rules.check(row) for row in rows]
+    risky, fired = rules.evaluate(*rules.encode(rows))
+
+    # Same rows after the checks were reordered by hit rate
+    reordered = RuleSet(disease, table, reorder_every=1)
+    reordered.evaluate(*reordered.encode(rows))
+    risky_reordered, fired_reordered = reordered.evaluate(*reordered.encode(rows))
+
+    problems = []
+    for i, want in enumerate(expected):
+        got = (scalar[i], "Risky" if risky[i] else "Normal", "Risky" if risky_reordered[i] else "Normal")
+        # The reported rule must not depend on the path or on check order
+        same_rule = fired_scalar[i] == int(fired[i]) == int(fired_reordered[i])
+        if got != (want, want, want) or not same_rule:
+            problems.append((rows[i], want, got + (fired_scalar[i], int(fired[i]), int(fired_reordered[i]))))
+
+    # Relabel tool: same labels from CSV columns (one key per column; a CSV
+    # missing a rule column is rejected, so only complete rows apply)
+    key_sets = {tuple(sorted(row)) for row in rows if len(row) == len(KEYS[disease])}
+    for keys in key_sets:
+        indices = [i for i, row in enumerate(rows) if tuple(sorted(row)) == keys]
+        subset = [rows[i] for i in indices]
+        labels, _ = rules.evaluate(*encode_frame(rules, pd.DataFrame(subset, columns=list(keys))))
+        for i, label in zip(indices, labels):
+            if ("Risky" if label else "Normal") != expected[i]:
+                problems.append((rows[i], expected[i], 'encode_frame label differs'))
+
+    n_risky = expected.count("Risky")
+    if problems:
+        failed = True
+        print(f"\n✗ {disease}: {len(problems)} mismatches out of {len(rows)} rows")
+        for row, want, got in problems[:5]:
+            print(f"   {row} -> expected {want}, got {got}")
+    else:
+        print(f"\n✓ {disease}: {len(rows)} rows match (Normal {len(rows) - n_risky}, Risky {n_risky})")
+
+print("\n" + "=" * 70)
+if failed:
+    print("❌ RULE ENGINE DOES NOT MATCH THE ORIGINAL RULE FUNCTIONS")
+    sys.exit(1)
+print("✅ Scalar, vectorized, reordered and relabel paths all match the original rules")